@@ -0,0 +1,72 @@
+"""
+Benchmark: airfield proximity for flight-phase labeling
+======================================================
+Compares dataProcessor.AirfieldIndex (KD-tree on unit-sphere vectors, one
+vectorized query) with the per-point proximity_check() loop on synthetic
+airfields and points spread over southern Europe. The loop is timed on a
+sample and extrapolated — running it on the full set would take hours.
+Both must agree on which sample points are near an airfield.
+
+Run (no database needed, DB_* variables may be left unset):
+    python benchmark/bench_airfield_proximity.py --airfields 10000 --points 1000000
+"""
+import os
+import sys
+import time
+import argparse
+from types import SimpleNamespace
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from dataProcessor import AirfieldIndex, proximity_check
+
+BBOX = (35.5, 52.0, -5.0, 30.0)  # lat_min, lat_max, lon_min, lon_max
+
+
+def run(n_airfields, n_points, loop_sample, radius_km):
+    rng = np.random.default_rng(42)
+    lat_min, lat_max, lon_min, lon_max = BBOX
+
+    airfields = [
+        SimpleNamespace(icao=f"A{i:03d}"[-4:], lat=lat, lon=lon)
+        for i, (lat, lon) in enumerate(zip(rng.uniform(lat_min, lat_max, n_airfields),
+                                           rng.uniform(lon_min, lon_max, n_airfields)))
+    ]
+    lats = rng.uniform(lat_min, lat_max, n_points)
+    lons = rng.uniform(lon_min, lon_max, n_points)
+
+    start = time.perf_counter()
+    index = AirfieldIndex(airfields)
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    nearest = index.query(lats, lons, radius_km)
+    query = time.perf_counter() - start
+
+    print(f"AirfieldIndex: build {build * 1000:.0f} ms, query {query:.2f} s "
+          f"for {n_points:,} points × {n_airfields:,} airfields ({np.sum(nearest >= 0):,} near an airfield)")
+
+    sample = min(loop_sample, n_points)
+    points = [SimpleNamespace(lat=lat, lon=lon, on_ground=True, altitude_agl_ft=0)
+              for lat, lon in zip(lats[:sample], lons[:sample])]
+    start = time.perf_counter()
+    loop_hits = [proximity_check(p, airfields, radius_km, 900) is not None for p in points]
+    loop = time.perf_counter() - start
+    mismatches = int(np.sum(np.array(loop_hits) != (nearest[:sample] >= 0)))
+    print(f"proximity_check loop: {loop:.2f} s for {sample:,} points "
+          f"→ ~{loop / sample * n_points / 60:.0f} min extrapolated to {n_points:,} "
+          f"({mismatches} disagreements with AirfieldIndex)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Airfield proximity benchmark")
+    parser.add_argument("--airfields", type=int, default=10_000)
+    parser.add_argument("--points", type=int, default=1_000_000)
+    parser.add_argument("--loop-sample", type=int, default=200,
+                        help="Points used to time the legacy per-point loop")
+    parser.add_argument("--radius", type=float, default=3.0, help="Airfield radius in km")
+    args = parser.parse_args()
+
+    run(args.airfields, args.points, args.loop_sample, args.radius)
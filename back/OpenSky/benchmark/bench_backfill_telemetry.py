@@ -0,0 +1,60 @@
+"""
+Benchmark: set-based speed backfill cost vs. history length
+==========================================================
+Seeds a TEMP copy of flight_telemetry (it shadows the real table for this
+connection only, nothing is written to production data) with a growing amount
+of already-resolved history and a fixed number of pending points, then times
+dataProcessor.BACKFILL_SPEED_SQL. The timing should stay flat as history grows.
+
+Run (needs the usual DB_* environment variables):
+    python benchmark/bench_backfill_telemetry.py --history 10000 100000 1000000
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from sqlalchemy import text
+import dataProcessor
+
+
+def run(history_sizes, pending, aircraft):
+    icao_list = [f"bb{i:04x}" for i in range(aircraft)]
+
+    for history in history_sizes:
+        with dataProcessor.get_engine().connect() as conn:
+            conn.execute(text(
+                "CREATE TEMP TABLE flight_telemetry (LIKE public.flight_telemetry INCLUDING ALL)"
+            ))
+            per_aircraft = history // aircraft
+            # Resolved history followed by `pending` unresolved points per aircraft
+            conn.execute(text("""
+                INSERT INTO flight_telemetry (icao24, timestamp, lat, lon, baro_altitude, speed_kph, source)
+                SELECT a.icao24, g.n * 10,
+                       43.0 + g.n * 0.0001, 4.0 + g.n * 0.0001, 500 + (g.n % 50),
+                       CASE WHEN g.n < :per_aircraft THEN 200 ELSE NULL END,
+                       'bench'
+                FROM unnest(CAST(:icao_list AS varchar[])) AS a(icao24)
+                CROSS JOIN generate_series(0, :per_aircraft + :pending - 1) AS g(n)
+            """), {"icao_list": icao_list, "per_aircraft": per_aircraft, "pending": pending})
+            conn.execute(text("ANALYZE flight_telemetry"))
+
+            start = time.perf_counter()
+            result = conn.execute(dataProcessor.BACKFILL_SPEED_SQL, {"icao_list": icao_list})
+            elapsed = time.perf_counter() - start
+
+            print(f"history={history:>10,}  pending={pending * aircraft:>6,}  "
+                  f"updated={result.rowcount:>6,}  {elapsed * 1000:8.1f} ms")
+            conn.rollback()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Speed backfill benchmark")
+    parser.add_argument("--history", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--pending", type=int, default=50, help="Unresolved points per aircraft")
+    parser.add_argument("--aircraft", type=int, default=20)
+    args = parser.parse_args()
+
+    run(args.history, args.pending, args.aircraft)
@@ -0,0 +1,94 @@
+"""
+Benchmark: telemetry ingest throughput
+======================================
+Compares rows/s for a historical backfill of N points spread over a fleet:
+  - per-aircraft bulk_insert_telemetry (insert().values(), one commit each)
+  - TelemetryIngestBuffer flush via INSERT ... SELECT FROM unnest(arrays)
+  - TelemetryIngestBuffer flush via COPY into a staging table
+
+Each run writes to a TEMP copy of flight_telemetry that shadows the real table
+for this connection only; nothing is written to production data.
+
+Run (needs the usual DB_* environment variables):
+    python benchmark/bench_ingest_telemetry.py --rows 10000 100000
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import logging
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+import migrate
+from aircraftDataHandler import bulk_insert_telemetry, TelemetryIngestBuffer
+
+
+def make_tracks(rows, aircraft):
+    per_aircraft = rows // aircraft
+    return {
+        f"bb{i:04x}": [
+            [1_700_000_000 + n * 5, 43.0 + random.random(), 4.0 + random.random(),
+             random.choice([None, 300.0, 1200.5]), random.random() * 360, random.random() < 0.1]
+            for n in range(per_aircraft)
+        ]
+        for i in range(aircraft)
+    }
+
+
+def ingest_per_aircraft(session, tracks):
+    for icao, path in tracks.items():
+        for start in range(0, len(path), 5000):  # stay under the bind-parameter limit
+            bulk_insert_telemetry(session, icao, path[start:start + 5000], source='fr24', is_processed=True)
+
+
+def ingest_buffer(copy):
+    def run(session, tracks):
+        buffer = TelemetryIngestBuffer(session, flush_rows=float('inf'), flush_seconds=float('inf'),
+                                       copy_rows=0 if copy else float('inf'))
+        for icao, path in tracks.items():
+            buffer.add(icao, path, source='fr24', is_processed=True)
+        buffer.flush()
+    return run
+
+
+METHODS = {
+    "bulk_insert_telemetry": ingest_per_aircraft,
+    "buffer (unnest)": ingest_buffer(copy=False),
+    "buffer (COPY)": ingest_buffer(copy=True),
+}
+
+
+def run(row_counts, aircraft):
+    logging.disable(logging.INFO)
+    for rows in row_counts:
+        tracks = make_tracks(rows, aircraft)
+        for name, method in METHODS.items():
+            with migrate.engine.connect() as conn:
+                conn.execute(text(
+                    "CREATE TEMP TABLE flight_telemetry (LIKE public.flight_telemetry INCLUDING ALL)"
+                ))
+                conn.commit()
+                session = Session(bind=conn)
+
+                start = time.perf_counter()
+                method(session, tracks)
+                elapsed = time.perf_counter() - start
+
+                stored = conn.execute(text("SELECT count(*) FROM flight_telemetry")).scalar()
+                print(f"rows={rows:>9,}  {name:<22} {elapsed:7.2f} s  {stored / elapsed:>10,.0f} rows/s")
+                session.close()
+                conn.execute(text("DROP TABLE pg_temp.flight_telemetry"))
+                conn.commit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Telemetry ingest benchmark")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--aircraft", type=int, default=50)
+    args = parser.parse_args()
+
+    run(args.rows, args.aircraft)
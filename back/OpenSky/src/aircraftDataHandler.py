@@ -1,10 +1,17 @@
-from sqlalchemy import func
+import io
+import os
+import time
+from sqlalchemy import func, text
 from datetime import datetime, timedelta
 from sqlalchemy.dialects.postgresql import insert
 from migrate import FlightTelemetry, TrackedAircraft
 import logging
 logger = logging.getLogger(__name__)
 
+INGEST_FLUSH_ROWS = int(os.getenv("INGEST_FLUSH_ROWS", 50000))
+INGEST_FLUSH_SECONDS = float(os.getenv("INGEST_FLUSH_SECONDS", 30))
+INGEST_COPY_ROWS = int(os.getenv("INGEST_COPY_ROWS", 10000))
+
 
 def get_all_tracked_icao24(session, active = False):
     """
@@ -50,6 +57,29 @@ def get_latest_timestamp(session, icao_code):
     
     return result if result is not None else -1
 
+# Latest timestamp per aircraft: one backward PK index seek each (LATERAL ...
+# LIMIT 1) rather than a GROUP BY that reads every aircraft's full history
+LATEST_TIMESTAMPS_SQL = text("""
+    SELECT a.icao24, t.timestamp
+    FROM unnest(CAST(:icao_list AS varchar[])) AS a(icao24)
+    CROSS JOIN LATERAL (
+        SELECT timestamp FROM flight_telemetry
+        WHERE icao24 = a.icao24
+        ORDER BY timestamp DESC
+        LIMIT 1
+    ) AS t
+""")
+
+def get_latest_timestamps(session, icao_list):
+    """
+    Returns {icao24: most recent timestamp} for the whole list in one query.
+    Aircraft with no data are absent — use .get(icao, -1).
+    """
+    icao_list = [icao.lower().strip() for icao in icao_list]
+    if not icao_list:
+        return {}
+    return dict(session.execute(LATEST_TIMESTAMPS_SQL, {"icao_list": icao_list}).all())
+
 def sync_flight_data(session, icao_code, raw_path_data):
     """
     Filters out old waypoints and inserts only the new ones.
@@ -71,25 +101,26 @@ def sync_flight_data(session, icao_code, raw_path_data):
     logger.info(f"Added {len(new_points)} new waypoints.")
 
 
+def _telemetry_row(icao24, p, source, is_processed):
+    """ One flight_telemetry row from a [ts, lat, lon, baro_m, track, on_ground] waypoint. """
+    return {
+        "icao24": icao24,
+        "timestamp": p[0],
+        "lat": p[1],
+        "lon": p[2],
+        "baro_altitude": p[3],
+        "baro_altitude_ft": round(p[3] * 3.28084) if p[3] else 0,
+        "true_track": p[4],
+        "on_ground": p[5],
+        "source": source,
+        "is_processed": is_processed,
+    }
+
 def bulk_insert_telemetry(session, icao24, path_data, source='opensky', is_processed=False):
     if not path_data:
         return
 
-    values = [
-        {
-            "icao24": icao24,
-            "timestamp": p[0],
-            "lat": p[1],
-            "lon": p[2],
-            "baro_altitude": p[3],
-            "baro_altitude_ft": round(p[3] * 3.28084) if p[3] else 0,
-            "true_track": p[4],
-            "on_ground": p[5],
-            "source": source,
-            "is_processed": is_processed,
-        }
-        for p in path_data
-    ]
+    values = [_telemetry_row(icao24, p, source, is_processed) for p in path_data]
 
     # 2. Create the 'ON CONFLICT DO NOTHING' statement
     # index_elements must match your Primary Key (icao24 + timestamp)
@@ -102,4 +133,167 @@ def bulk_insert_telemetry(session, icao24, path_data, source='opensky', is_proce
         logger.info(f"Bulk insert complete. Processed {len(values)} points.")
     except Exception as e:
         session.rollback() # Diplomatic cleanup if things go wrong
-        logger.error(f"Bulk insert failed: {e}")
\ No newline at end of file
+        logger.error(f"Bulk insert failed: {e}")
+
+INGEST_COLUMNS = [
+    ("icao24", "varchar"), ("timestamp", "integer"), ("lat", "double precision"), ("lon", "double precision"),
+    ("baro_altitude", "double precision"), ("baro_altitude_ft", "double precision"),
+    ("true_track", "double precision"), ("on_ground", "boolean"), ("source", "varchar"), ("is_processed", "boolean"),
+]
+
+# Whole buffer in one statement: one array parameter per column, so the size is
+# not bounded by the bind-parameter limit of a multi-row VALUES list
+INGEST_TELEMETRY_SQL = text(f"""
+    INSERT INTO flight_telemetry ({", ".join(c for c, _ in INGEST_COLUMNS)})
+    SELECT * FROM unnest({", ".join(f"CAST(:{c} AS {t}[])" for c, t in INGEST_COLUMNS)})
+    ON CONFLICT (icao24, timestamp) DO NOTHING
+""")
+
+def _copy_value(value):
+    """ One field in PostgreSQL COPY text format. """
+    if value is None:
+        return "\\N"
+    if value is True or value is False:
+        return "t" if value else "f"
+    if isinstance(value, str):
+        return value.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+    return str(value)
+
+def copy_insert_telemetry(session, columns):
+    """
+    Large-batch ingest: COPY FROM STDIN into a temporary staging table, then
+    INSERT ... SELECT ... ON CONFLICT DO NOTHING to dedup against the
+    (icao24, timestamp) PK. `columns` maps each INGEST_COLUMNS name to one
+    value per row. Runs in the session's transaction (the staging table is
+    dropped on commit); returns the number of rows inserted.
+    """
+    names = [c for c, _ in INGEST_COLUMNS]
+    n = len(columns["icao24"])
+    if not n:
+        return 0
+
+    session.execute(text(f"""
+        CREATE TEMP TABLE flight_telemetry_staging ({", ".join(f"{c} {t}" for c, t in INGEST_COLUMNS)})
+        ON COMMIT DROP
+    """))
+
+    buf = io.StringIO()
+    for row in zip(*(columns[c] for c in names)):
+        buf.write("\t".join(_copy_value(v) for v in row))
+        buf.write("\n")
+    buf.seek(0)
+
+    cursor = session.connection().connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY flight_telemetry_staging ({', '.join(names)}) FROM STDIN", buf)
+    finally:
+        cursor.close()
+
+    return session.execute(text(f"""
+        INSERT INTO flight_telemetry ({", ".join(names)})
+        SELECT {", ".join(names)} FROM flight_telemetry_staging
+        ON CONFLICT (icao24, timestamp) DO NOTHING
+    """)).rowcount
+
+class TelemetryIngestBuffer:
+    """
+    Accumulates telemetry rows from every source over a sync cycle and writes
+    them with a single INSERT ... ON CONFLICT DO NOTHING per flush.
+
+    The first row added for an (icao24, timestamp) wins, as it would have with
+    one insert per source in the same order. A flush happens when flush_rows
+    rows are pending or the oldest pending row is flush_seconds old, and on flush().
+    Flushes of copy_rows rows or more (historical backfills) go through COPY.
+
+    If the single statement fails, the flush falls back to one insert per
+    aircraft and source, so a bad row only holds back its own batch. Batches
+    that still fail stay pending for the next flush and their aircraft are
+    listed in `failed`; callers must not advance checkpoints for them.
+    """
+
+    def __init__(self, session, flush_rows=INGEST_FLUSH_ROWS, flush_seconds=INGEST_FLUSH_SECONDS,
+                 copy_rows=INGEST_COPY_ROWS):
+        self.session = session
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self.copy_rows = copy_rows
+        self.inserted = 0
+        self.newest = {}   # newest timestamp queued per aircraft
+        self.failed = set()   # aircraft whose rows could not be written by the last flush
+        self._rows = {}
+        self._since = None
+
+    def __len__(self):
+        return len(self._rows)
+
+    def add(self, icao24, path_data, source='opensky', is_processed=False):
+        """ Queue waypoints for one aircraft and source. Returns how many were new to the buffer. """
+        before = len(self._rows)
+        for p in path_data:
+            self._rows.setdefault((icao24, p[0]), _telemetry_row(icao24, p, source, is_processed))
+            if p[0] > self.newest.get(icao24, -1):
+                self.newest[icao24] = p[0]
+        if self._since is None and self._rows:
+            self._since = time.monotonic()
+
+        added = len(self._rows) - before
+        if len(self._rows) >= self.flush_rows or (self._since and time.monotonic() - self._since >= self.flush_seconds):
+            self.flush()
+        return added
+
+    def flush(self):
+        """ Write all pending rows and commit. Returns the number of rows actually inserted. """
+        if not self._rows:
+            return 0
+
+        rows = list(self._rows.values())
+        self._rows = {}
+        self._since = None
+        params = {c: [r[c] for r in rows] for c, _ in INGEST_COLUMNS}
+
+        start = time.perf_counter()
+        self.failed = set()
+        try:
+            if len(rows) >= self.copy_rows:
+                inserted = copy_insert_telemetry(self.session, params)
+            else:
+                inserted = self.session.execute(INGEST_TELEMETRY_SQL, params).rowcount
+            self.session.commit()
+        except Exception as e:
+            self.session.rollback()
+            logger.error(f"Telemetry ingest flush failed ({len(rows)} rows), retrying per aircraft/source: {e}")
+            inserted = self._flush_batches(rows)
+
+        self.inserted += inserted
+        logger.info(f"Ingest flush: {inserted} of {len(rows)} rows inserted in {time.perf_counter() - start:.2f}s.")
+        return inserted
+
+    def _flush_batches(self, rows):
+        """ One INSERT and commit per (icao24, source); failed batches go back to the pending rows. """
+        batches = {}
+        for r in rows:
+            batches.setdefault((r["icao24"], r["source"]), []).append(r)
+
+        inserted = 0
+        for (icao24, source), batch in batches.items():
+            try:
+                inserted += self.session.execute(
+                    INGEST_TELEMETRY_SQL, {c: [r[c] for r in batch] for c, _ in INGEST_COLUMNS}
+                ).rowcount
+                self.session.commit()
+            except Exception as e:
+                self.session.rollback()
+                logger.error(f"[{icao24}] Ingest of {len(batch)} {source} rows failed, kept for retry: {e}")
+                self.failed.add(icao24)
+                for r in batch:
+                    self._rows.setdefault((r["icao24"], r["timestamp"]), r)
+        if self._rows and self._since is None:
+            self._since = time.monotonic()
+        return inserted
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
@@ -0,0 +1,56 @@
+import os
+import asyncio
+import logging
+import httpx
+from openSkyCollector import AdsbV2Collector
+logger = logging.getLogger(__name__)
+
+# Concurrent requests allowed per source (each source is its own host)
+ADSB_SOURCE_CONCURRENCY = int(os.getenv("ADSB_SOURCE_CONCURRENCY", 4))
+
+
+def create_async_client(max_connections=32, timeout=15):
+    """httpx.AsyncClient with keep-alive pooling, shared by every async collector in one event loop."""
+    return httpx.AsyncClient(
+        timeout=timeout,
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+    )
+
+
+class AsyncAdsbV2Collector(AdsbV2Collector):
+    """AdsbV2Collector whose 50-ICAO batches all run concurrently, at most `concurrency` in flight."""
+
+    def __init__(self, source, client, concurrency=ADSB_SOURCE_CONCURRENCY):
+        super().__init__(source)
+        self.client = client
+        self.semaphore = asyncio.Semaphore(concurrency)
+
+    async def _fetch_batch(self, batch, clean_icao, results):
+        async with self.semaphore:
+            try:
+                logger.info(f"Calling {self.source} API")
+                response = await self.client.get(self._batch_url(batch))
+                response.raise_for_status()
+                self._parse_aircraft(response.json().get('ac', []), clean_icao, results)
+            except Exception as e:
+                logger.error(f"{self.source} error: {e}")
+
+    async def get_by_icao24(self, icao_list):
+        clean_icao = {icao.lower() for icao in icao_list}
+        icao_batch_list = list(clean_icao)
+        results = {}
+
+        await asyncio.gather(*(
+            self._fetch_batch(icao_batch_list[i:i + self.ICAO_BATCH_SIZE], clean_icao, results)
+            for i in range(0, len(icao_batch_list), self.ICAO_BATCH_SIZE)
+        ))
+
+        logger.info(f"{self.source} returned {len(results)} tracked aircraft")
+        return results
+
+
+async def fetch_adsb_sources(sources, icao_list):
+    """All batches of all ADSB sources concurrently in one event loop; one result dict per source."""
+    async with create_async_client() as client:
+        collectors = [AsyncAdsbV2Collector(source, client) for source in sources]
+        return await asyncio.gather(*(c.get_by_icao24(icao_list) for c in collectors))
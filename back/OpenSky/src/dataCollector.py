@@ -4,23 +4,29 @@ import argparse
 import sys
 import logging
 import json
+import fcntl
+import asyncio
 from datetime import datetime
 logger = logging.getLogger(__name__)
 
 from migrate import SessionLocal
 from concurrent.futures import ThreadPoolExecutor
-from openSkyCollector import FirefleetCollector, AdsbV2Collector, FR24Collector
+from openSkyCollector import FirefleetCollector, AdsbV2Collector, FR24Collector, FR24Budget, _FR24_REG_RE
+from fr24Cache import FR24TrackCache, records_to_points
 
 from aircraftDataHandler import (
     get_all_tracked_icao24, 
-    get_latest_timestamp, 
-    bulk_insert_telemetry
+    get_latest_timestamps, 
+    TelemetryIngestBuffer
 )
 
 CACHE_FILE           = "tracked_icao_cache.json"
-ADSB_CACHE_FILE      = "adsb_supplement_cache.json"
-FR24_CACHE_FILE      = "fr24_cache.json"
+ADSB_CACHE_FILE      = "adsb_supplement_cache.jsonl"   # append-only point log
+ADSB_LEGACY_CACHE    = "adsb_supplement_cache.json"    # pre-log format, merged once if present
+FR24_CACHE_DIR       = "fr24_cache"        # index.json + one binary track file per aircraft
+FR24_LEGACY_CACHE    = "fr24_cache.json"   # pre-binary format, converted once if present
 FR24_FETCHED_ID_FILE = "fr24_fetched_ids.json"
+FR24_CHECKPOINT_FILE = "fr24_checkpoints.json"   # {fr24_id: {"last_ts", "advanced_at"}}
 
 FR24_FETCHED_TTL = 6 * 3600  # prune completed legs older than 6h
 
@@ -39,21 +45,91 @@ def _cache_point_score(cp):
     return sum(1 for f in ('lat', 'lon', 'baro_alt', 'true_track')
                if cp.get(f) is not None)
 
+def _append_adsb_points(points, path=ADSB_CACHE_FILE):
+    """
+    Append points to the ADSB log as JSON lines, in one write under an
+    exclusive flock. If the log was rotated for a merge while we waited for
+    the lock, reopen the new file so nothing lands in the one being merged.
+    """
+    if not points:
+        return 0
+    data = "".join(json.dumps(p, separators=(',', ':')) + "\n" for p in points)
+    while True:
+        with open(path, 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                if not os.path.exists(path) or os.stat(path).st_ino != os.fstat(f.fileno()).st_ino:
+                    continue  # rotated under us
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+                return len(points)
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+def _index_adsb_points(lines, cache=None):
+    """
+    Per-icao index {icao24: {ts_str: point}} of ADSB log lines. On the same
+    timestamp the point with more populated fields wins. A truncated line
+    (interrupted write) is skipped.
+    """
+    cache = {} if cache is None else cache
+    for line in lines:
+        try:
+            p = json.loads(line)
+            icao24, ts = p.pop('icao24'), str(p.pop('timestamp'))
+        except (ValueError, KeyError):
+            continue
+        points = cache.setdefault(icao24, {})
+        if ts not in points or _cache_point_score(p) > _cache_point_score(points[ts]):
+            points[ts] = p
+    return cache
+
+def _take_adsb_cache(path=ADSB_CACHE_FILE):
+    """
+    Atomically take the current ADSB log for merging: rename it to
+    <path>.merging under the writers' lock (new points go to a fresh log),
+    then index it. A .merging file left by an interrupted sync is read too.
+    Returns (cache, merging_path); delete merging_path once merged.
+    """
+    merging = f"{path}.merging"
+    if os.path.exists(path):
+        with open(path, 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                if os.path.exists(merging):
+                    # Leftover from an interrupted merge — fold it into the new batch
+                    with open(merging, 'r') as old:
+                        f.write(old.read())
+                os.replace(path, merging)
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    cache = {}
+    if os.path.exists(ADSB_LEGACY_CACHE):
+        try:
+            with open(ADSB_LEGACY_CACHE, 'r') as f:
+                for icao24, points in json.load(f).items():
+                    _index_adsb_points((json.dumps({'icao24': icao24, 'timestamp': ts, **p}) for ts, p in points.items()), cache)
+        except Exception as e:
+            logger.warning(f"Could not read legacy ADSB cache: {e}")
+    if os.path.exists(merging):
+        with open(merging, 'r') as f:
+            _index_adsb_points(f, cache)
+    return cache, merging
+
 def update_adsb_cache():
     """Fetch from all supplementary sources and store new points in cache."""
-    supplementary = [
-        AdsbV2Collector('adsbfi'),
-        AdsbV2Collector('airplaneslive'),
-        AdsbV2Collector('adsbonelol'),
-        AdsbV2Collector('adsboneapi'),
-    ]
+    from asyncCollectors import fetch_adsb_sources
+
+    supplementary = ['adsbfi', 'airplaneslive', 'adsbonelol', 'adsboneapi']
 
     full_db_icao_list = get_cached_icao_list()
 
-    # Fetch all sources in parallel, merge keeping freshest per icao24.
+    # Fetch all batches of all sources concurrently (one event loop, per-source
+    # concurrency limit), merge keeping freshest per icao24.
     # On equal timestamps, keep the point with more populated fields.
-    with ThreadPoolExecutor() as ex:
-        all_results = list(ex.map(lambda s: s.get_by_icao24(full_db_icao_list), supplementary))
+    all_results = asyncio.run(fetch_adsb_sources(supplementary, full_db_icao_list))
 
     merged = {}
     for source_results in all_results:
@@ -69,24 +145,12 @@ def update_adsb_cache():
         logger.info("ADSB cache update: no data returned.")
         return
 
-    # Load existing cache
-    cache = {}
-    if os.path.exists(ADSB_CACHE_FILE):
-        try:
-            with open(ADSB_CACHE_FILE, 'r') as f:
-                cache = json.load(f)
-        except Exception as e:
-            logger.warning(f"Could not read ADSB cache: {e}")
-
-    # Add new points — one entry per timestamp per icao24.
-    # On collision, keep whichever point has more populated fields.
-    new_count = updated_count = 0
-    for icao24, data in merged.items():
-        ts = str(data['timestamp'])
-        if icao24 not in cache:
-            cache[icao24] = {}
-
-        incoming = {
+    # Append to the point log — O(new points); duplicates and richer points
+    # on the same timestamp are resolved when the log is read for merging
+    appended = _append_adsb_points([
+        {
+            'icao24':     icao24,
+            'timestamp':  data['timestamp'],
             'lat':        data['lat'],
             'lon':        data['lon'],
             'baro_alt':   data['baro_alt'],
@@ -94,32 +158,110 @@ def update_adsb_cache():
             'true_track': data['true_track'],
             'source':     data['source'],
         }
+        for icao24, data in merged.items()
+    ])
+
+    logger.info(f"ADSB cache updated: {appended} points appended.")
+
+def _load_fr24_checkpoints(path=FR24_CHECKPOINT_FILE, keep=()):
+    """
+    Last ingested timestamp per fr24_id ({fr24_id: {"last_ts", "advanced_at"}}),
+    pruned of legs not advanced within FR24_FETCHED_TTL unless listed in `keep`
+    (the legs of the current cache). Pruning goes by when the checkpoint was
+    written, not by the age of the leg's points, so a backfilled leg days old
+    keeps its checkpoint.
+    """
+    try:
+        with open(path, 'r') as f:
+            checkpoints = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        logger.warning(f"Could not read FR24 checkpoints: {e}")
+        return {}
+    now = int(time.time())
+    # Bare timestamps come from the previous file format: count them as advanced now
+    checkpoints = {k: v if isinstance(v, dict) else {'last_ts': v, 'advanced_at': now}
+                   for k, v in checkpoints.items()}
+    cutoff = now - FR24_FETCHED_TTL
+    return {k: v for k, v in checkpoints.items() if k in keep or v.get('advanced_at', 0) >= cutoff}
 
-        if ts not in cache[icao24]:
-            cache[icao24][ts] = incoming
-            new_count += 1
-        elif _info_score(incoming) > _cache_point_score(cache[icao24][ts]):
-            cache[icao24][ts] = incoming
-            updated_count += 1
+def _save_fr24_checkpoints(checkpoints, path=FR24_CHECKPOINT_FILE):
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(checkpoints, f)
+    os.replace(tmp, path)
 
-    # Write back
-    with open(ADSB_CACHE_FILE, 'w') as f:
-        json.dump(cache, f)
+def _fr24_checkpoint(checkpoints, fr24_id):
+    """Last ingested timestamp of a leg, or None."""
+    return checkpoints.get(fr24_id, {}).get('last_ts')
 
-    logger.info(f"ADSB cache updated: {new_count} new points, {updated_count} replaced with richer data.")
+def advance_fr24_checkpoints(fr24_cache, checkpoints, icaos=None):
+    """
+    Move each cached leg's checkpoint to its newest point, only for the aircraft
+    in `icaos` (all cached ones if None). Returns the number of legs advanced.
+    """
+    now = int(time.time())
+    advanced = 0
+    for icao in (fr24_cache.icaos() if icaos is None else icaos):
+        for leg in fr24_cache.legs(icao):
+            last_ts = leg.get('last_ts')
+            previous = _fr24_checkpoint(checkpoints, leg['fr24_id'])
+            if leg['count'] and last_ts is not None and last_ts > (previous if previous is not None else -1):
+                checkpoints[leg['fr24_id']] = {'last_ts': last_ts, 'advanced_at': now}
+                advanced += 1
+    return advanced
+
+def _convert_legacy_fr24_cache(path=FR24_LEGACY_CACHE, directory=FR24_CACHE_DIR):
+    """
+    Turn the pre-binary JSON cache ({icao24: {"fr24_id", "track"}}) into the first
+    versioned cache, once, so its ongoing legs are carried over and its points
+    ingested. Its legs have no `ended` flag; carry-over then goes by the last
+    point, as it did with the JSON file.
+    """
+    if not os.path.exists(path):
+        return
+    track_cache = FR24TrackCache(directory)
+    track_cache.begin()
+    # Re-checked under the cache lock: another process may have converted it meanwhile
+    if not os.path.exists(path) or track_cache.index:
+        track_cache.abort()
+        if os.path.exists(path):
+            os.remove(path)   # a binary cache already replaced it
+        return
+    try:
+        with open(path, 'r') as f:
+            legacy = json.load(f)
+        for icao, data in legacy.items():
+            if data.get('fr24_id') and data.get('track'):
+                track_cache.append_leg(icao, data['fr24_id'], data['track'])
+    except Exception as e:
+        logger.warning(f"Could not convert legacy FR24 cache, keeping it: {e}")
+        track_cache.abort()
+        return
+    total_points = track_cache.commit()
+    os.remove(path)
+    logger.info(f"Converted legacy FR24 cache: {len(track_cache.index)} aircraft, {total_points} track points.")
 
-def update_fr24_cache(icao_filter=None, hours=3, dt_from_override=None, dt_to_override=None):
+def update_fr24_cache(icao_filter=None, hours=3, dt_from_override=None, dt_to_override=None, dry_run=False):
     """Query FR24 for the full fleet and cache positions and tracks.
 
     icao_filter: optional list of icao24 strings — bypasses DB type/capacity filters.
     hours: lookback window in hours (default 3), ignored when dt_from_override is set.
     dt_from_override: ISO datetime string for window start (e.g. '2024-08-01T10:00:00Z').
     dt_to_override: ISO datetime string for window end (default: now).
+    dry_run: only report the calls that would be made and the budget left; no FR24 request is sent.
+
+    All calls go through the collector's FR24Budget (rolling request window
+    persisted across runs); ongoing legs are fetched before completed ones.
+    Legs already partly ingested (FR24_CHECKPOINT_FILE) only keep points after
+    their checkpoint.
     """
-    fr24 = FR24Collector() if os.getenv('FR24_API_KEY') else None
-    if not fr24:
+    if not os.getenv('FR24_API_KEY') and not dry_run:
         logger.info("FR24 cache: no API key configured, skipping.")
         return
+    budget = FR24Budget(dry_run=dry_run)
+    fr24 = FR24Collector(budget=budget)
 
     session = None
     try:
@@ -175,29 +317,28 @@ def update_fr24_cache(icao_filter=None, hours=3, dt_from_override=None, dt_to_ov
     # Skip legs where the last point is on the ground or older than 3 hours.
     stale_cutoff = now - 3 * 3600
     prev_ongoing = {}
-    if os.path.exists(FR24_CACHE_FILE):
-        try:
-            with open(FR24_CACHE_FILE, 'r') as f:
-                prev_cache = json.load(f)
-            for icao, data in prev_cache.items():
-                fr24_id = data.get('fr24_id')
-                if not fr24_id or fr24_id in fetched_ids:
-                    continue
-                track = data.get('track', [])
-                if not track:
+    prev_legs = {}   # fr24_id → last run's index entry, for legs whose delta comes back empty
+    _convert_legacy_fr24_cache()
+    track_cache = FR24TrackCache(FR24_CACHE_DIR)
+    try:
+        for icao in track_cache.icaos():
+            for leg in track_cache.legs(icao):
+                fr24_id = leg['fr24_id']
+                prev_legs[fr24_id] = leg
+                if leg.get('ended') or leg.get('last_ts') is None or fr24_id in fetched_ids:
                     continue
-                last = track[-1]  # [timestamp, lat, lon, baro_alt, true_track, on_ground]
-                last_ts   = last[0] if len(last) > 0 else 0
-                on_ground = last[5] if len(last) > 5 else False
-                if on_ground:
+                if leg['on_ground']:
                     logger.info(f"[{icao}] FR24: leg {fr24_id} ended on ground, not carrying over.")
                     continue
-                if last_ts < stale_cutoff:
+                if leg['last_ts'] < stale_cutoff:
                     logger.info(f"[{icao}] FR24: leg {fr24_id} last seen >3h ago, not carrying over.")
                     continue
                 prev_ongoing[icao] = fr24_id
-        except Exception:
-            pass
+    except Exception as e:
+        logger.warning(f"Could not read previous FR24 cache: {e}")
+
+    if dry_run:
+        return _report_fr24_plan(budget, all_reg_to_icao, prev_ongoing)
 
     # 1. Get all flight legs in the window
     summaries = fr24.get_flight_summaries(all_reg_to_icao, dt_from, dt_to)
@@ -209,8 +350,12 @@ def update_fr24_cache(icao_filter=None, hours=3, dt_from_override=None, dt_to_ov
             logger.info(f"[{icao}] FR24: carrying over ongoing leg {fr24_id} from previous cache.")
             summaries.append({'icao24': icao, 'fr24_id': fr24_id, 'flight_ended': False})
 
-    # 2. Fetch tracks — skip completed legs already in the fetched set
-    tracks_by_icao = {}
+    # 2. Fetch tracks — ongoing legs first (freshest data, and they are the ones
+    # that matter if the budget runs short); skip completed legs already fetched.
+    # Each leg is appended to the new cache as soon as it arrives.
+    summaries.sort(key=lambda e: bool(e.get('flight_ended', False)))
+    checkpoints = _load_fr24_checkpoints(keep=set(prev_legs))
+    track_cache.begin()
     for entry in summaries:
         icao         = entry['icao24']
         fr24_id      = entry['fr24_id']
@@ -220,9 +365,11 @@ def update_fr24_cache(icao_filter=None, hours=3, dt_from_override=None, dt_to_ov
         if flight_ended and fr24_id in fetched_ids:
             logger.info(f"[{icao}] FR24: skipping completed leg {fr24_id} (already fetched).")
             continue
-        time.sleep(6)  # 10 req/min budget
-        points = fr24.get_track(icao, fr24_id)
-        tracks_by_icao.setdefault(icao, []).extend(points)
+        since_ts = _fr24_checkpoint(checkpoints, fr24_id)
+        points = fr24.get_track(icao, fr24_id, since_ts=since_ts)
+        if points or since_ts is not None:
+            track_cache.append_leg(icao, fr24_id, points, ended=flight_ended, last_ts=since_ts,
+                                   previous=prev_legs.get(fr24_id))
         if flight_ended:
             fetched_ids[fr24_id] = now
 
@@ -230,24 +377,36 @@ def update_fr24_cache(icao_filter=None, hours=3, dt_from_override=None, dt_to_ov
     with open(FR24_FETCHED_ID_FILE, 'w') as f:
         json.dump(fetched_ids, f)
 
-    # 3. Build cache from tracks only — store fr24_id so next run can carry it over
-    results = {}
-    for entry in summaries:
-        icao    = entry['icao24']
-        fr24_id = entry['fr24_id']
-        if icao in tracks_by_icao:
-            results[icao] = {'icao24': icao, 'source': 'fr24', 'fr24_id': fr24_id, 'track': tracks_by_icao[icao]}
-
-    if results:
-        with open(FR24_CACHE_FILE, 'w') as f:
-            json.dump(results, f)
-        logger.info(f"FR24 cache updated: {len(results)} aircraft, {sum(len(v['track']) for v in results.values())} total track points.")
+    # 3. Swap in the new cache — the index keeps each leg's fr24_id so next run can carry it over
+    total_points = track_cache.commit()
+    if track_cache.index:
+        logger.info(f"FR24 cache updated: {len(track_cache.index)} aircraft, {total_points} total track points.")
     else:
-        if os.path.exists(FR24_CACHE_FILE):
-            os.remove(FR24_CACHE_FILE)
         logger.info("FR24 cache: no active aircraft.")
 
 
+def _report_fr24_plan(budget, reg_to_icao, prev_ongoing):
+    """Dry run of update_fr24_cache: log and return the planned FR24 calls."""
+    valid_regs = [r for r in reg_to_icao if _FR24_REG_RE.match(r)]
+    plan = {
+        'summary_calls':      -(-len(valid_regs) // 20),
+        'ongoing_track_calls': len(prev_ongoing),
+        'budget_available':   budget.available(),
+        'budget_limit':       budget.limit,
+        'budget_window_s':    budget.window,
+    }
+    known_calls = plan['summary_calls'] + plan['ongoing_track_calls']
+    over = max(known_calls - plan['budget_available'], 0)
+    plan['min_duration_s'] = -(-over // budget.limit) * budget.window + (budget.wait_time() if over else 0)
+
+    logger.info(
+        f"FR24 dry run: {plan['summary_calls']} flight-summary calls ({len(valid_regs)} registrations), "
+        f"{plan['ongoing_track_calls']} track calls for ongoing legs ({', '.join(prev_ongoing.values()) or 'none'}), "
+        f"plus one track call per new leg found. Budget: {plan['budget_available']}/{budget.limit} "
+        f"available per {budget.window:.0f}s; known calls need at least {plan['min_duration_s']:.0f}s."
+    )
+    return plan
+
 def get_cached_icao_list():
     full_db_icao_list = None
     if os.path.exists(CACHE_FILE):
@@ -259,7 +418,15 @@ def get_cached_icao_list():
             logger.error(f"Cache read failed: {e}")
     return full_db_icao_list
 
-def orchestrate_sync():
+def orchestrate_sync(icao_list=None, latest_timestamps=None):
+    """
+    One sync cycle: live positions and tracks from every source into flight_telemetry.
+    Returns the aircraft that had data this cycle.
+
+    icao_list: fleet to sync; read from CACHE_FILE / the DB when None.
+    latest_timestamps: {icao24: newest stored timestamp} kept by the caller; read
+    from the DB when None, otherwise used as is and advanced after the ingest.
+    """
     TOKEN = os.getenv('OPENSKY_CLIENT_TOKEN')
     collector = FirefleetCollector(TOKEN)
     session   = None
@@ -268,7 +435,7 @@ def orchestrate_sync():
         session = SessionLocal()
 
         # Load tracked ICAO list
-        full_db_icao_list = get_cached_icao_list()
+        full_db_icao_list = icao_list if icao_list is not None else get_cached_icao_list()
 
         if full_db_icao_list is None:
             full_db_icao_list = get_all_tracked_icao24(session, False)
@@ -283,62 +450,71 @@ def orchestrate_sync():
         full_icao_list_dict = collector.get_by_icao24(full_db_icao_list)
         opensky_active = {ac['icao24'] for ac in full_icao_list_dict}
 
-        # FR24 — read from cache populated by update_fr24_cache()
-        fr24_cache = {}
-        if os.path.exists(FR24_CACHE_FILE):
-            try:
-                with open(FR24_CACHE_FILE, 'r') as f:
-                    fr24_cache = json.load(f)
-                logger.info(f"Loaded FR24 cache: {len(fr24_cache)} active aircraft.")
-            except Exception as e:
-                logger.warning(f"Could not read FR24 cache: {e}")
-        fr24_active = set(fr24_cache.keys())
+        # FR24 — cache populated by update_fr24_cache(); only the index is read here,
+        # each aircraft's track is memory-mapped when its turn comes
+        _convert_legacy_fr24_cache()
+        fr24_cache = FR24TrackCache(FR24_CACHE_DIR)
+        fr24_checkpoints = _load_fr24_checkpoints(keep=set(fr24_cache.fr24_ids()))
+        fr24_since = {fr24_id: c['last_ts'] for fr24_id, c in fr24_checkpoints.items()}
+        fr24_active = set(fr24_cache.icaos())
+        if fr24_active:
+            logger.info(f"Loaded FR24 cache: {len(fr24_active)} active aircraft.")
 
         if not opensky_active:
             logger.info("No active aircraft in OpenSky...")
         if not fr24_active:
             logger.info("No active aircraft in FR24...")
 
-        # Load ADSB supplement cache
-        adsb_cache = {}
-        if os.path.exists(ADSB_CACHE_FILE):
-            try:
-                with open(ADSB_CACHE_FILE, 'r') as f:
-                    adsb_cache = json.load(f)
-                logger.info(f"Loaded ADSB cache with {sum(len(v) for v in adsb_cache.values())} points.")
-            except Exception as e:
-                logger.warning(f"Could not read ADSB cache: {e}")
+        # Take the ADSB supplement log (rotated atomically; refreshes keep appending to a new one)
+        adsb_cache, adsb_merging = _take_adsb_cache()
+        if adsb_cache:
+            logger.info(f"Loaded ADSB cache with {sum(len(v) for v in adsb_cache.values())} points.")
 
         logger.info(f"Syncing full fleet of {len(full_db_icao_list)} aircraft (OpenSky: {len(opensky_active)}, FR24: {len(fr24_active)})...")
 
+        # Checkpoint for the whole fleet up front — no DB reads in the loop
+        keep_timestamps = latest_timestamps is not None
+        if not keep_timestamps:
+            latest_timestamps = get_latest_timestamps(session, full_db_icao_list)
+
+        # OpenSky tracks fetched concurrently, paced by the collector's rate limiter
+        opensky_tracks = collector.get_aircraft_tracks(
+            [icao for icao in full_db_icao_list if icao in opensky_active]
+        )
+
+        # All sources are queued into one buffer and written in bulk
+        ingest = TelemetryIngestBuffer(session)
+
         for icao in full_db_icao_list:
-            last_ts = get_latest_timestamp(session, icao)
+            last_ts = latest_timestamps.get(icao, -1)
 
             # OpenSky track — bbox-filtered
             if icao in opensky_active:
-                track_data = collector.get_aircraft_track(icao)
+                track_data = opensky_tracks.get(icao)
                 if track_data and 'path' in track_data:
                     new_points = [p for p in track_data['path'] if p[0] > last_ts]
                     if new_points:
-                        bulk_insert_telemetry(session, icao, new_points)
-                        logger.info(f"[{icao}] OpenSky: inserted {len(new_points)} points.")
+                        ingest.add(icao, new_points)
+                        logger.info(f"[{icao}] OpenSky: queued {len(new_points)} points.")
                         last_ts = max(p[0] for p in new_points)
                     else:
                         logger.debug(f"[{icao}] OpenSky: up-to-date.")
                 else:
                     logger.debug(f"[{icao}] OpenSky: no live data.")
 
-            # FR24 — historical points skip labeling (is_processed=True);
+            # FR24 — only points past each leg's checkpoint are forwarded;
+            # historical points skip labeling (is_processed=True),
             # only points newer than last_ts enter the processing pipeline.
             if icao in fr24_active:
-                fr24_points = fr24_cache[icao].get('track', [])
-                if fr24_points:
-                    historical = [p for p in fr24_points if p[0] <= last_ts]
-                    new_points  = [p for p in fr24_points if p[0] >  last_ts]
+                fr24_points = fr24_cache.track_since(icao, fr24_since)
+                if len(fr24_points):
+                    is_new = fr24_points['ts'] > last_ts
+                    historical = records_to_points(fr24_points[~is_new])
+                    new_points  = records_to_points(fr24_points[is_new])
                     if historical:
-                        bulk_insert_telemetry(session, icao, historical, source='fr24', is_processed=True)
+                        ingest.add(icao, historical, source='fr24', is_processed=True)
                     if new_points:
-                        bulk_insert_telemetry(session, icao, new_points, source='fr24')
+                        ingest.add(icao, new_points, source='fr24')
                     logger.info(f"[{icao}] FR24: {len(historical)} historical (pre-processed) + {len(new_points)} new.")
 
             # ADSB cache — insert all cached points; DB PK (icao24, timestamp) rejects duplicates.
@@ -358,17 +534,38 @@ def orchestrate_sync():
                     by_source.setdefault(src, []).append(row)
                 total = 0
                 for src, rows in by_source.items():
-                    bulk_insert_telemetry(session, icao, rows, source=src)
+                    ingest.add(icao, rows, source=src)
                     total += len(rows)
                 if total:
                     logger.info(f"[{icao}] ADSB cache: submitted {total} points ({list(by_source.keys())}).")
 
-            time.sleep(0.5)
-
-        # Clear the cache after successful merge
-        if os.path.exists(ADSB_CACHE_FILE):
-            os.remove(ADSB_CACHE_FILE)
-            logger.info("ADSB cache cleared after merge.")
+        ingest.flush()
+        logger.info(f"Ingest complete: {ingest.inserted} new telemetry points.")
+        if keep_timestamps:
+            # Aircraft whose rows failed to flush stay where they were, so the points are fetched again
+            for icao, ts in ingest.newest.items():
+                if icao not in ingest.failed:
+                    latest_timestamps[icao] = max(latest_timestamps.get(icao, -1), ts)
+
+        # FR24 legs now in the DB — the next sync and refresh start past them. Aircraft
+        # whose rows failed to flush keep their checkpoint so the points are sent again.
+        if ingest.failed:
+            logger.warning(f"Ingest failed for {sorted(ingest.failed)}: their checkpoints are not advanced.")
+        fr24_ingested = [icao for icao in full_db_icao_list if icao in fr24_active and icao not in ingest.failed]
+        if advance_fr24_checkpoints(fr24_cache, fr24_checkpoints, fr24_ingested):
+            _save_fr24_checkpoints(fr24_checkpoints)
+
+        # Clear the merged log after successful ingest; otherwise the next
+        # sync folds it in again (the PK rejects what was already written)
+        adsb_failed = ingest.failed & set(adsb_cache)
+        if adsb_failed:
+            logger.warning(f"ADSB cache kept for retry: ingest failed for {sorted(adsb_failed)}.")
+        else:
+            for merged_file in (adsb_merging, ADSB_LEGACY_CACHE):
+                if os.path.exists(merged_file):
+                    os.remove(merged_file)
+            if adsb_cache:
+                logger.info("ADSB cache cleared after merge.")
 
         logger.info("[DONE] Fleet sync completed successfully.")
         adsb_inserted = {icao for icao in full_db_icao_list if icao in adsb_cache}
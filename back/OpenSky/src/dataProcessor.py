@@ -1,8 +1,11 @@
 import os
+import atexit
+import signal
+import threading
 import time
 import json
 import argparse
-import requests
+from httpSession import get_session, log_connection_stats
 import sys
 import logging
 logger = logging.getLogger(__name__)
@@ -10,20 +13,32 @@ logger = logging.getLogger(__name__)
 from datetime import datetime, timedelta
 import math
 from datetime import datetime
-from sqlalchemy import create_engine, desc, func, or_, and_
+from sqlalchemy import create_engine, desc, func, or_, and_, text, tuple_
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.orm import sessionmaker
 from math import radians, cos, sin, asin, sqrt
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import heapq
 import numpy as np
-from sklearn.cluster import DBSCAN
-from scipy.spatial import ConvexHull
-from shapely.geometry import Polygon, MultiPolygon, MultiPoint, Point
-from shapely.ops import unary_union
+# sklearn, scipy and shapely are imported by the functions that use them:
+# cache refreshes and syncs run often and never need them
 ELEVATION_API_URL = os.getenv("ELEVATION_API_URL", "http://localhost:8011")
+# 'http' → elevation_api service, 'local' → sample the DEM tiles in-process
+ELEVATION_BACKEND = os.getenv("ELEVATION_BACKEND", "http")
+ELEVATION_DATA_DIR = os.getenv("ELEVATION_DATA_DIR", os.path.join(os.path.dirname(__file__), "..", "data"))
+AGL_CHUNK_SIZE = int(os.getenv("AGL_CHUNK_SIZE", 20000))
+LABEL_WRITE_CHUNK = int(os.getenv("LABEL_WRITE_CHUNK", 50000))
+GEOCODE_CACHE_TTL_DAYS = int(os.getenv("GEOCODE_CACHE_TTL_DAYS", 30))
+GEOCODE_CACHE_MAX_ROWS = int(os.getenv("GEOCODE_CACHE_MAX_ROWS", 20000))
+DAEMON_INTERVAL = int(os.getenv("DAEMON_INTERVAL", 300))
+DAEMON_RESYNC_INTERVAL = int(os.getenv("DAEMON_RESYNC_INTERVAL", 3600))
+GEOCODER_DATA_PATH = os.getenv("GEOCODER_DATA_PATH", os.path.join(os.path.dirname(__file__), "..", "data", "geocoder.geojson"))
 
 import migrate
 from dataCollector import orchestrate_sync, update_adsb_cache, update_fr24_cache, discover_new_aircraft
-from firmsCollector import run_firms_sync
+from aircraftDataHandler import get_all_tracked_icao24, get_latest_timestamps
+from openSkyCollector import fetch_opensky_token
 
 user = os.getenv('DB_USER', 'neondb_owner')
 password = os.getenv('DB_PASSWORD')
@@ -34,9 +49,34 @@ db_opts = os.getenv('DB_OPTIONS', 'sslmode=disable')
 db_url = f"postgresql://{user}:{password}@{db_host}/{db_name}?{db_opts}"
 
 # --- Database Setup ---
-engine = create_engine(db_url)
-Session = sessionmaker(bind=engine)
-db = Session()
+# Nothing connects until first use: commands that never query through this
+# module (--adsb-cache, --fr24-cache) skip its engine setup entirely. The
+# FR24 refresh, --dry-run included, still reads the fleet through migrate's
+# SessionLocal.
+_engine = None
+Session = sessionmaker()
+
+def get_engine():
+    """ The module engine, created (and bound to Session) on first call. """
+    global _engine
+    if _engine is None:
+        _engine = create_engine(db_url)
+        Session.configure(bind=_engine)
+    return _engine
+
+class _LazySession:
+    """ Module-wide `db` session, opened on first attribute access. """
+
+    def __init__(self):
+        self._session = None
+
+    def __getattr__(self, name):
+        if self._session is None:
+            get_engine()
+            self._session = Session()
+        return getattr(self._session, name)
+
+db = _LazySession()
 
 ''' 
     Haversine: 
@@ -49,113 +89,221 @@ def haversine(lon1, lat1, lon2, lat2):
     a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
     return 6371 * 2 * asin(sqrt(a))
 
-def backfill_telemetry( icao_list = None):
-    # 1. Get all unique ICAO24s that have empty speed data
+def _sql_list(values):
+    """Column values as a plain Python list for an array bind parameter (NaN → NULL)."""
+    if isinstance(values, np.ndarray):
+        if values.dtype.kind == 'f':
+            return [None if v != v else v for v in values.tolist()]
+        return values.tolist()
+    return list(values)
 
+def bulk_update_telemetry(session, icao24s, timestamps, **columns):
+    """
+    Write per-point values back to flight_telemetry in a single
+    UPDATE ... FROM unnest(arrays), keyed on the (icao24, timestamp) PK.
+    Each keyword is a column name mapped to one value per point.
+    """
+    if len(icao24s) == 0:
+        return 0
+
+    table = migrate.FlightTelemetry.__table__
+    pg = postgresql.dialect()
+    names = list(columns)
+    arrays = ", ".join(f"CAST(:{c} AS {table.c[c].type.compile(dialect=pg)}[])" for c in names)
+
+    stmt = text(f"""
+        UPDATE flight_telemetry AS t
+        SET {", ".join(f"{c} = v.{c}" for c in names)}
+        FROM unnest(CAST(:icao24 AS varchar[]), CAST(:timestamp AS integer[]), {arrays})
+             AS v(icao24, timestamp, {", ".join(names)})
+        WHERE t.icao24 = v.icao24
+          AND t.timestamp = v.timestamp
+    """)
+    params = {"icao24": _sql_list(icao24s), "timestamp": [int(ts) for ts in timestamps]}
+    params.update({c: _sql_list(values) for c, values in columns.items()})
+    return session.execute(stmt, params).rowcount
+
+# Speed / vertical speed for every unresolved point, computed against its single
+# predecessor (one PK index seek per point via LATERAL ... LIMIT 1) so the cost
+# only depends on the number of NULL rows, not on how much history each
+# aircraft has. Rounding mirrors the former per-row Python implementation.
+BACKFILL_SPEED_SQL = text("""
+    UPDATE flight_telemetry AS t
+    SET speed_kph            = s.speed_kph,
+        speed_kt             = round(CAST(s.speed_kph * 0.539957 AS numeric), 2),
+        vertical_speed_mmin  = s.vertical_speed_mmin,
+        vertical_speed_ftmin = round(CAST(s.vertical_speed_mmin * 3.28084 AS numeric), 0)
+    FROM (
+        SELECT cur.icao24,
+               cur.timestamp,
+               round(CAST(
+                   6371 * 2 * asin(least(1.0, sqrt(
+                       power(sin(radians(cur.lat - prev.lat) / 2), 2) +
+                       cos(radians(prev.lat)) * cos(radians(cur.lat)) *
+                       power(sin(radians(cur.lon - prev.lon) / 2), 2)
+                   ))) / ((cur.timestamp - prev.timestamp) / 3600.0)
+               AS numeric), 2) AS speed_kph,
+               round(CAST(
+                   (cur.baro_altitude - prev.baro_altitude) / ((cur.timestamp - prev.timestamp) / 60.0)
+               AS numeric), 2) AS vertical_speed_mmin
+        FROM flight_telemetry AS cur
+        CROSS JOIN LATERAL (
+            SELECT p.timestamp, p.lat, p.lon, p.baro_altitude
+            FROM flight_telemetry AS p
+            WHERE p.icao24 = cur.icao24
+              AND p.timestamp < cur.timestamp
+            ORDER BY p.timestamp DESC
+            LIMIT 1
+        ) AS prev
+        WHERE cur.icao24 = ANY(CAST(:icao_list AS varchar[]))
+          AND cur.speed_kph IS NULL
+    ) AS s
+    WHERE t.icao24 = s.icao24
+      AND t.timestamp = s.timestamp
+""")
+
+def backfill_telemetry( icao_list = None):
+    """
+    Fill speed_kph / speed_kt / vertical_speed_* for every point of the given
+    aircraft that has no speed yet, in a single UPDATE.
+    The first point of a track has no predecessor and stays NULL.
+    """
     if icao_list == None:
         logger.info("No aircraft data")
         return
-    aircraft_ids = db.query(migrate.FlightTelemetry.icao24).filter(
-        migrate.FlightTelemetry.icao24.in_(icao_list),
-        migrate.FlightTelemetry.speed_kph == None
-    ).distinct().all()
- 
-
-    for (icao,) in aircraft_ids:
-        logger.debug(f"Processing aircraft: {icao}")
-        
-        # 2. Get all points for this aircraft, oldest first
-        points = db.query(migrate.FlightTelemetry).filter(
-            migrate.FlightTelemetry.icao24 == icao
-        ).order_by(migrate.FlightTelemetry.timestamp.asc()).all()
-
-        for i in range(1, len(points)):
-            curr = points[i]
-            prev = points[i-1]
-
-            time_diff = curr.timestamp - prev.timestamp
 
-            # 3. Logic:
-            if curr.speed_kph is None:
-
-                # Skip duplicate timestamps — cannot compute speed over zero time
-                if time_diff == 0:
-                    logger.debug(f"[{icao}] Duplicate timestamp {curr.timestamp} — skipping speed calc")
-                    continue
-
-                hours = time_diff / 3600
-                minutes = time_diff / 60
-
-                # Horizontal Speed
-                dist_km = haversine(prev.lon, prev.lat, curr.lon, curr.lat)
-                curr.speed_kph = round(dist_km / hours, 2)
-                curr.speed_kt = round(curr.speed_kph * 0.539957, 2)
-
-                # Vertical Speed
-                if curr.baro_altitude is not None and prev.baro_altitude is not None:
-                    alt_diff_m = curr.baro_altitude - prev.baro_altitude
-                    curr.vertical_speed_mmin = round(alt_diff_m / minutes, 2)
-                    curr.vertical_speed_ftmin = round(curr.vertical_speed_mmin * 3.28084, 0)
-        
-        # Commit per aircraft to keep memory usage low
-        db.commit()
-    logger.info("Backfill complete!")
+    start = time.perf_counter()
+    result = db.execute(BACKFILL_SPEED_SQL, {"icao_list": list(icao_list)})
+    db.commit()
+    logger.info(f"Backfill complete! {result.rowcount} points updated in {time.perf_counter() - start:.2f}s.")
     
-def backfill_agl():
-    # 1. Fetch only records that have baro_altitude but missing AGL
-    points_to_fix = db.query(migrate.FlightTelemetry).filter(
-        migrate.FlightTelemetry.baro_altitude != None,
-        migrate.FlightTelemetry.altitude_agl_ft == None
-    ).order_by(
-        desc(migrate.FlightTelemetry.timestamp)
-    ).all()
+AGL_SENTINEL_FT = 60000  # no ground elevation available — excluded from labeling, can be reprocessed
 
-    if not points_to_fix:
-        logger.debug("No pending AGL calculations found.")
-        return
-
-    logger.info(f"Calculating AGL for {len(points_to_fix)} points via elevation API...")
+_local_tiles = None
 
-    BATCH_SIZE = 500
-    for batch_start in range(0, len(points_to_fix), BATCH_SIZE):
-        batch = points_to_fix[batch_start:batch_start + BATCH_SIZE]
+def _get_local_tiles():
+    """DEM tiles loaded once per process for the 'local' elevation backend."""
+    global _local_tiles
+    if _local_tiles is None:
+        from elevation import ElevationTileSet
+        _local_tiles = ElevationTileSet.from_dir(ELEVATION_DATA_DIR)
+    return _local_tiles
 
+def _fetch_elevations_http(lats, lons, batch_size=20000):
+    """
+    Ground elevation (m) via the elevation API's binary batch endpoint,
+    NaN where unavailable or on failure.
+    """
+    ground = np.full(len(lats), np.nan)
+    for batch_start in range(0, len(lats), batch_size):
+        batch = slice(batch_start, batch_start + batch_size)
+        coords = np.column_stack([lats[batch], lons[batch]]).astype("<f8")
         try:
-            payload = [{"lat": p.lat, "lon": p.lon} for p in batch]
-            resp = requests.post(
-                f"{ELEVATION_API_URL}/elevation/batch",
-                json=payload,
+            resp = get_session().post(
+                f"{ELEVATION_API_URL}/elevation/batch/bin",
+                params={"dtype": "f8"},
+                data=coords.tobytes(),
+                headers={"Content-Type": "application/octet-stream"},
                 timeout=30,
             )
             resp.raise_for_status()
-            elevations = resp.json()   # list of {lat, lon, elevation_m, elevation_ft}
+            elevations = np.frombuffer(resp.content, dtype="<f4")   # NaN = no coverage
+            if len(elevations) != len(coords):
+                raise ValueError(f"expected {len(coords)} elevations, got {len(elevations)}")
         except Exception as e:
             logger.error(f"Elevation API batch failed: {e} — marking batch as sentinel")
-            for p in batch:
-                p.altitude_agl_ft = 60000
             continue
 
-        for p, elev in zip(batch, elevations):
-            ground_m = elev.get("elevation_m")
-            if ground_m is not None:
-                agl_m = max(0, p.baro_altitude - ground_m)
-                p.altitude_agl_ft = round(agl_m * 3.28084, 0)
-            else:
-                # Outside tile coverage — use sentinel so it can be reprocessed
-                # if tiles are added later
-                p.altitude_agl_ft = 60000
+        ground[batch] = elevations
+        logger.debug(f"AGL batch {batch_start}–{batch_start + len(coords)} done")
+    return ground
 
-        logger.debug(f"AGL batch {batch_start}–{batch_start + len(batch)} done")
+def fetch_ground_elevations(lats, lons):
+    """Ground elevation in metres for coordinate arrays, NaN where no DEM coverage."""
+    lats = np.asarray(lats, dtype=float)
+    lons = np.asarray(lons, dtype=float)
+    ground = np.full(len(lats), np.nan)
 
-    db.commit()
-    logger.info("Batch AGL backfill complete.")
+    valid = np.isfinite(lats) & np.isfinite(lons)
+    if not valid.any():
+        return ground
+
+    if ELEVATION_BACKEND == "local":
+        ground[valid] = _get_local_tiles().sample(lats[valid], lons[valid])
+    else:
+        ground[valid] = _fetch_elevations_http(lats[valid], lons[valid])
+    return ground
+
+def compute_agl_ft(baro_altitude_m, ground_m):
+    """AGL in feet (clamped at 0), AGL_SENTINEL_FT where ground elevation is unknown."""
+    agl_m = np.maximum(0, np.asarray(baro_altitude_m, dtype=float) - ground_m)
+    return np.where(np.isnan(ground_m), AGL_SENTINEL_FT, np.round(agl_m * 3.28084, 0))
+
+def _pending_agl_chunk(after, limit):
+    """
+    Next page of points missing AGL, newest first, as narrow column tuples.
+    Keyset-paged on (timestamp, icao24) so each page is an index range scan.
+    """
+    ft = migrate.FlightTelemetry
+    query = db.query(ft.icao24, ft.timestamp, ft.lat, ft.lon, ft.baro_altitude).filter(
+        ft.baro_altitude != None,
+        ft.altitude_agl_ft == None
+    )
+    if after is not None:
+        query = query.filter(tuple_(ft.timestamp, ft.icao24) < tuple_(*after))
+    return query.order_by(desc(ft.timestamp), desc(ft.icao24)).limit(limit).all()
+
+def _fetch_chunk_elevations(rows):
+    return fetch_ground_elevations([r.lat for r in rows], [r.lon for r in rows])
+
+def backfill_agl(chunk_size=AGL_CHUNK_SIZE):
+    """
+    Streaming AGL backfill: pending points are paged by keyset, the ground
+    elevation fetch for chunk N+1 runs in a worker thread while chunk N is
+    written with one bulk UPDATE, and every chunk is committed on its own —
+    memory stays at two chunks and progress survives a crash.
+    """
+    start = time.perf_counter()
+    rows = _pending_agl_chunk(None, chunk_size)
+    if not rows:
+        logger.debug("No pending AGL calculations found.")
+        return
+
+    logger.info(f"Calculating AGL in chunks of {chunk_size} via {ELEVATION_BACKEND} elevation backend...")
+
+    total = 0
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        pending = pool.submit(_fetch_chunk_elevations, rows)
+        while rows:
+            last = rows[-1]
+            next_rows = _pending_agl_chunk((last.timestamp, last.icao24), chunk_size) if len(rows) == chunk_size else []
+
+            ground = pending.result()
+            if next_rows:
+                pending = pool.submit(_fetch_chunk_elevations, next_rows)
+
+            # Outside tile coverage → sentinel, so it can be reprocessed if tiles are added later
+            agl_ft = compute_agl_ft([r.baro_altitude for r in rows], ground)
+            bulk_update_telemetry(
+                db,
+                [r.icao24 for r in rows],
+                [r.timestamp for r in rows],
+                altitude_agl_ft=agl_ft,
+            )
+            db.commit()
+
+            total += len(rows)
+            logger.debug(f"AGL chunk committed ({total} points so far)")
+            rows = next_rows
+
+    logger.info(f"Batch AGL backfill complete: {total} points in {time.perf_counter() - start:.1f}s.")
 
 REVERSE_GEOCODE_URL = "https://api.bigdatacloud.net/data/reverse-geocode-client"
 
 def _reverse_geocode_location(lat, lon):
     """Return the country name for a point, or a sea/ocean name if it's over open water."""
     try:
-        resp = requests.get(
+        resp = get_session().get(
             REVERSE_GEOCODE_URL,
             params={"latitude": lat, "longitude": lon, "localityLanguage": "en"},
             timeout=10,
@@ -178,39 +326,121 @@ def _reverse_geocode_location(lat, lon):
 
     return "International waters"
 
+_offline_geocoder = None
+
+def _get_offline_geocoder():
+    """Country/sea polygons loaded once per process; None if the data file is missing."""
+    global _offline_geocoder
+    if _offline_geocoder is None:
+        if not os.path.exists(GEOCODER_DATA_PATH):
+            logger.warning(f"No offline geocoder data at {GEOCODER_DATA_PATH} — using the reverse-geocoding API only.")
+            return None
+        from geocoder import OfflineGeocoder
+        _offline_geocoder = OfflineGeocoder.from_geojson(GEOCODER_DATA_PATH)
+    return _offline_geocoder
+
+def _reverse_geocode_cached(points, precision=6):
+    """
+    Reverse-geocode (lat, lon) points through the geocode_cache table: one API
+    call per geohash cell not cached within the TTL. Returns the locations
+    (None where the API failed) and the number of cache hits.
+    """
+    from geocoder import geohash_encode
+
+    gc = migrate.GeocodeCache
+    now = int(time.time())
+    cells = [geohash_encode(lat, lon, precision) for lat, lon in points]
+
+    cached = dict(db.query(gc.cell, gc.location).filter(
+        gc.cell.in_(set(cells)),
+        gc.fetched_at >= now - GEOCODE_CACHE_TTL_DAYS * 86400
+    ).all()) if cells else {}
+    hit_cells = set(cached)
+
+    resolved = dict(cached)
+    for (lat, lon), cell in zip(points, cells):
+        if cell not in resolved:
+            resolved[cell] = _reverse_geocode_location(lat, lon)
+
+    fetched = [
+        {"cell": cell, "location": loc, "fetched_at": now, "last_used": now}
+        for cell, loc in resolved.items() if cell not in hit_cells and loc
+    ]
+    if fetched:
+        stmt = postgresql.insert(gc).values(fetched)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[gc.cell],
+            set_={"location": stmt.excluded.location, "fetched_at": now, "last_used": now}
+        ))
+    if hit_cells:
+        db.query(gc).filter(gc.cell.in_(hit_cells)).update({gc.last_used: now}, synchronize_session=False)
+
+    # Expire past the TTL, then keep only the most recently used cells
+    db.query(gc).filter(gc.fetched_at < now - GEOCODE_CACHE_TTL_DAYS * 86400).delete(synchronize_session=False)
+    db.execute(text("""
+        DELETE FROM geocode_cache
+        WHERE cell IN (SELECT cell FROM geocode_cache ORDER BY last_used DESC OFFSET :keep)
+    """), {"keep": GEOCODE_CACHE_MAX_ROWS})
+
+    hits = sum(cell in hit_cells for cell in cells)
+    return [resolved[cell] for cell in cells], hits
+
 def backfill_aircraft_location():
     """
     Resolve the country (or sea/ocean) of each aircraft's last known position
     and store it on that latest FlightTelemetry row (not on TrackedAircraft).
     Intended to run once daily — not per-telemetry-point.
+
+    Positions are resolved offline in one vectorized pass; points outside the
+    local polygons go through geocode_cache, then the reverse-geocoding API.
     """
-    aircraft = db.query(migrate.TrackedAircraft).filter(
-        migrate.TrackedAircraft.last_seen.isnot(None)
+    start = time.perf_counter()
+    last_points = db.query(
+        migrate.FlightTelemetry.icao24,
+        migrate.FlightTelemetry.timestamp,
+        migrate.FlightTelemetry.lat,
+        migrate.FlightTelemetry.lon
+    ).join(
+        migrate.TrackedAircraft,
+        (migrate.TrackedAircraft.icao24 == migrate.FlightTelemetry.icao24) &
+        (migrate.TrackedAircraft.last_seen == migrate.FlightTelemetry.timestamp)
+    ).filter(
+        migrate.FlightTelemetry.lat.isnot(None),
+        migrate.FlightTelemetry.lon.isnot(None)
     ).all()
 
-    if not aircraft:
+    if not last_points:
         logger.debug("No aircraft with a known last position.")
         return
 
-    updated = 0
-    for ac in aircraft:
-        last_point = db.query(migrate.FlightTelemetry).filter(
-            migrate.FlightTelemetry.icao24 == ac.icao24,
-            migrate.FlightTelemetry.timestamp == ac.last_seen,
-        ).first()
-
-        if not last_point or last_point.lat is None or last_point.lon is None:
-            continue
-
-        location = _reverse_geocode_location(last_point.lat, last_point.lon)
-        if location:
-            last_point.location = location
-            updated += 1
-
-        time.sleep(1)  # polite rate limit for the free reverse-geocoding API
+    icao24s, timestamps, lats, lons = (list(c) for c in zip(*last_points))
 
+    geocoder = _get_offline_geocoder()
+    if geocoder is not None:
+        locations = geocoder.lookup(lats, lons)
+    else:
+        locations = np.full(len(lats), None, dtype=object)
+
+    misses = [i for i, loc in enumerate(locations) if loc is None]
+    cache_hits = 0
+    if misses:
+        api_locations, cache_hits = _reverse_geocode_cached([(lats[i], lons[i]) for i in misses])
+        for i, loc in zip(misses, api_locations):
+            locations[i] = loc
+
+    resolved = [i for i, loc in enumerate(locations) if loc]
+    updated = bulk_update_telemetry(
+        db,
+        [icao24s[i] for i in resolved],
+        [timestamps[i] for i in resolved],
+        location=[locations[i] for i in resolved],
+    )
     db.commit()
-    logger.info(f"Location backfill complete: {updated} aircraft updated.")
+    logger.info(
+        f"Location backfill complete: {updated} aircraft updated "
+        f"({len(last_points) - len(misses)} offline, {cache_hits} cache hits, "
+        f"{len(misses) - cache_hits} cache misses, {time.perf_counter() - start:.2f}s)."
+    )
 
 def calculate_distance(lat1, lon1, lat2, lon2):
     """Returns distance in km between two points."""
@@ -239,20 +469,147 @@ def get_unprocessed_points():
   
     return points
     
-def get_lastest_aircraft_data():
-    last_known_airfields = db.query(
-        migrate.FlightTelemetry.icao24,
-        migrate.FlightTelemetry.latest_airfield,
-        migrate.FlightTelemetry.latest_waterfield,
-        migrate.FlightTelemetry.is_full,
-        migrate.FlightTelemetry.timestamp
+# One-time seed of aircraft_state from telemetry history, for databases that
+# predate the table. Same semantics as the former DISTINCT ON lookups: airfield
+# state from the latest point with a latest_airfield, position from the latest
+# processed point.
+SEED_AIRCRAFT_STATE_SQL = text("""
+    INSERT INTO aircraft_state (icao24, latest_airfield, latest_waterfield, is_full, state_timestamp,
+                                last_lat, last_lon, last_seen)
+    SELECT coalesce(s.icao24, p.icao24), s.latest_airfield, s.latest_waterfield, s.is_full, s.timestamp,
+           p.lat, p.lon, p.timestamp
+    FROM (
+        SELECT DISTINCT ON (icao24) icao24, latest_airfield, latest_waterfield, is_full, timestamp
+        FROM flight_telemetry
+        WHERE latest_airfield IS NOT NULL
+        ORDER BY icao24, timestamp DESC
+    ) AS s
+    FULL OUTER JOIN (
+        SELECT DISTINCT ON (icao24) icao24, lat, lon, timestamp
+        FROM flight_telemetry
+        WHERE is_processed
+        ORDER BY icao24, timestamp DESC
+    ) AS p ON p.icao24 = s.icao24
+    ON CONFLICT (icao24) DO NOTHING
+""")
+
+# Per-aircraft upsert from a labeled batch; each half of the state only moves
+# forward in time, so late-arriving history never overwrites newer state.
+UPSERT_AIRCRAFT_STATE_SQL = text("""
+    INSERT INTO aircraft_state AS a (icao24, latest_airfield, latest_waterfield, is_full, state_timestamp,
+                                     last_lat, last_lon, last_seen)
+    SELECT * FROM unnest(
+        CAST(:icao24 AS varchar[]), CAST(:latest_airfield AS varchar[]), CAST(:latest_waterfield AS varchar[]),
+        CAST(:is_full AS boolean[]), CAST(:state_timestamp AS integer[]),
+        CAST(:last_lat AS double precision[]), CAST(:last_lon AS double precision[]), CAST(:last_seen AS integer[])
+    )
+    ON CONFLICT (icao24) DO UPDATE SET
+        latest_airfield   = CASE WHEN a.state_timestamp IS NULL OR EXCLUDED.state_timestamp > a.state_timestamp
+                                 THEN EXCLUDED.latest_airfield ELSE a.latest_airfield END,
+        latest_waterfield = CASE WHEN a.state_timestamp IS NULL OR EXCLUDED.state_timestamp > a.state_timestamp
+                                 THEN EXCLUDED.latest_waterfield ELSE a.latest_waterfield END,
+        is_full           = CASE WHEN a.state_timestamp IS NULL OR EXCLUDED.state_timestamp > a.state_timestamp
+                                 THEN EXCLUDED.is_full ELSE a.is_full END,
+        state_timestamp   = greatest(a.state_timestamp, EXCLUDED.state_timestamp),
+        last_lat          = CASE WHEN a.last_seen IS NULL OR EXCLUDED.last_seen > a.last_seen
+                                 THEN EXCLUDED.last_lat ELSE a.last_lat END,
+        last_lon          = CASE WHEN a.last_seen IS NULL OR EXCLUDED.last_seen > a.last_seen
+                                 THEN EXCLUDED.last_lon ELSE a.last_lon END,
+        last_seen         = greatest(a.last_seen, EXCLUDED.last_seen)
+""")
+
+def seed_aircraft_state(session=None):
+    """ Fill aircraft_state from telemetry history if it is empty. Returns the number of rows seeded. """
+    session = session or db
+    if session.query(migrate.AircraftState.icao24).first() is not None:
+        return 0
+    seeded = session.execute(SEED_AIRCRAFT_STATE_SQL).rowcount
+    session.commit()
+    if seeded:
+        logger.info(f"Seeded aircraft_state for {seeded} aircraft from telemetry history.")
+    return seeded
+
+def aircraft_state_from_batch(cols, labels):
+    """
+    Per-aircraft state rows for a labeled batch: airfield state from each
+    aircraft's latest point with a latest_airfield, position from its latest
+    point. Returns a dict of equal-length lists ready for UPSERT_AIRCRAFT_STATE_SQL.
+    The batch must not be empty.
+    """
+    order = np.lexsort((cols["timestamp"], cols["icao24"]))
+    icao24 = cols["icao24"][order]
+    boundary = icao24[1:] != icao24[:-1]
+    group_start = np.flatnonzero(np.r_[True, boundary])
+    last = order[np.r_[boundary, True]]
+
+    # Latest row with an airfield, per aircraft: forward fill, read at each group end
+    filled = np.where(labels["latest_airfield"][order] != None, np.arange(len(order)), -1)
+    np.maximum.accumulate(filled, out=filled)
+    state_pos = filled[np.r_[boundary, True]]
+    found = state_pos >= group_start
+    state = order[np.maximum(state_pos, 0)]
+
+    def pick(values):
+        return [v if ok else None for v, ok in zip(values[state].tolist(), found)]
+
+    return {
+        "icao24":            cols["icao24"][last].tolist(),
+        "latest_airfield":   pick(labels["latest_airfield"]),
+        "latest_waterfield": pick(labels["latest_waterfield"]),
+        "is_full":           pick(labels["is_full"]),
+        "state_timestamp":   pick(cols["timestamp"]),
+        "last_lat":          _sql_list(cols["lat"][last]),
+        "last_lon":          _sql_list(cols["lon"][last]),
+        "last_seen":         cols["timestamp"][last].tolist(),
+    }
+
+# Columns each piece of reference data is built from; a change in any of them
+# (fingerprinted server-side) invalidates the cached copy
+REFERENCE_SOURCES = {
+    "airfields":   [("airfields", ("icao", "lat", "lon"))],
+    "waterfields": [("regions_of_interest", ("id", "type", "level", "geometry", "water_location_id")),
+                    ("water_locations", ("id", "ref"))],
+    "aircraft":    [("tracked_aircraft", ("icao24", "aircraft_type", "sea_landing", "payload_capacity_kg"))],
+    "fleet":       [("tracked_aircraft", ("icao24", "active"))],
+}
+
+# {key: (fingerprint, value)} kept between runs by the daemon; None means
+# no caching — one-shot runs load everything fresh
+_reference_cache = None
+
+def _reference_fingerprint(session, source):
+    """ Row count and md5 of the source columns of each table, computed in the database. """
+    fingerprint = []
+    for table, columns in REFERENCE_SOURCES[source]:
+        row = session.execute(text(
+            f"SELECT count(*), md5(string_agg(concat_ws(',', {', '.join(columns)}), '|' ORDER BY {columns[0]})) FROM {table}"
+        )).one()
+        fingerprint.append(tuple(row))
+    return tuple(fingerprint)
+
+def _cached_reference(session, key, source, loader):
+    """ loader() result, reused while the fingerprint of its source tables is unchanged. """
+    if _reference_cache is None:
+        return loader()
+    fingerprint = _reference_fingerprint(session, source)
+    cached = _reference_cache.get(key)
+    if cached and cached[0] == fingerprint:
+        return cached[1]
+    logger.info(f"Loading reference data: {key}")
+    value = loader()
+    _reference_cache[key] = (fingerprint, value)
+    return value
+
+def get_lastest_aircraft_data(session=None):
+    """ Last known airfield / is_full / waterfield per aircraft, read from aircraft_state. """
+    session = session or db
+    last_known_airfields = session.query(
+        migrate.AircraftState.icao24,
+        migrate.AircraftState.latest_airfield,
+        migrate.AircraftState.latest_waterfield,
+        migrate.AircraftState.is_full
     ).filter(
-        migrate.FlightTelemetry.latest_airfield.isnot(None)
-    ).distinct(
-        migrate.FlightTelemetry.icao24
-    ).order_by(
-        migrate.FlightTelemetry.icao24, 
-        desc(migrate.FlightTelemetry.timestamp)
+        migrate.AircraftState.state_timestamp.isnot(None)
     ).all()
     
     airfield_dict   = {row.icao24: row.latest_airfield   for row in last_known_airfields}
@@ -261,8 +618,9 @@ def get_lastest_aircraft_data():
 
     return airfield_dict, is_full_dict, waterfield_dict
 
-def get_water_bombers():
-    water_bombers = db.query(
+def get_water_bombers(session=None):
+    session = session or db
+    water_bombers = session.query(
         migrate.TrackedAircraft.icao24,
         migrate.TrackedAircraft.payload_capacity_kg,
         migrate.TrackedAircraft.last_seen
@@ -277,7 +635,10 @@ def get_water_bombers():
     return water_bombers_dict
 
 def get_level_poly(level=3):
-    roi_data = db.query(migrate.RegionOfInterest).filter(migrate.RegionOfInterest.level == level).all()
+    from shapely.geometry import Polygon
+    roi_data = db.query(
+        migrate.RegionOfInterest.id, migrate.RegionOfInterest.geometry
+    ).filter(migrate.RegionOfInterest.level == level).all()
     level_polygons = []
     for r in roi_data:
         try:
@@ -297,120 +658,394 @@ def proximity_check( point, airfields, radius_km, alt_threshold_ft):
             return af
     return None
 
-def label_flight_phases(threshold_ft=750, helicopter_threshold_ft=500, water_threshold_ft=10, airfield_radius=3.0, airfield_alt_threshold=900, waterfield_alt_threshold=200):
-    # 1. Load all airfields into memory for fast lookup
-    airfields = db.query(migrate.Airfield).all()
+EARTH_RADIUS_KM = 6371.0
 
-    water_rois = db.query(migrate.RegionOfInterest).filter(
-        migrate.RegionOfInterest.type == 'water',
-        migrate.RegionOfInterest.level == 2,
-        migrate.RegionOfInterest.water_location_id.isnot(None)
-    ).all()
+def _unit_vectors(lats, lons):
+    """Lat/lon (degrees) → 3D points on the unit sphere."""
+    lat, lon = np.radians(lats), np.radians(lons)
+    cos_lat = np.cos(lat)
+    return np.column_stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)])
 
-    water_roi_polys = []
-    for roi in water_rois:
-        try:
-            coords = json.loads(roi.geometry)
-            if len(coords) >= 3:
-                poly = Polygon(coords)
-                wl = db.query(migrate.WaterLocation).filter_by(id=roi.water_location_id).first()
-                if wl:
-                    water_roi_polys.append((poly, wl.ref))
-        except Exception:
-            continue
+class AirfieldIndex:
+    """
+    KD-tree over all airfields, built once per labeling run. Airfields are
+    stored as unit-sphere vectors: the straight-line (chord) distance grows
+    monotonically with the haversine distance, so a radius in km maps to an
+    exact chord bound. Answers "nearest airfield within radius" for whole
+    point arrays at once instead of a calculate_distance() per point × airfield.
+    """
 
-    points = get_unprocessed_points()
-    if not points:
-        logger.debug("No new points to label.")
-        return
+    def __init__(self, airfields):
+        from scipy.spatial import cKDTree
+        self.airfields = list(airfields)
+        self.tree = None
+        if self.airfields:
+            self.tree = cKDTree(_unit_vectors([af.lat for af in self.airfields],
+                                              [af.lon for af in self.airfields]))
+
+    def query(self, lats, lons, radius_km):
+        """Index into self.airfields of the nearest airfield within radius_km, -1 if none."""
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        nearest = np.full(len(lats), -1, dtype=np.intp)
+
+        valid = np.isfinite(lats) & np.isfinite(lons)
+        if self.tree is None or not valid.any():
+            return nearest
+
+        # Tiny margin so a point exactly at radius_km (as calculate_distance
+        # computes it) is not lost to floating-point rounding of the chord
+        chord = 2 * math.sin(radius_km / EARTH_RADIUS_KM / 2) * (1 + 1e-9)
+        dist, idx = self.tree.query(_unit_vectors(lats[valid], lons[valid]), k=1,
+                                    distance_upper_bound=chord)
+        nearest[valid] = np.where(np.isfinite(dist), idx, -1)
+        return nearest
+
+class WaterfieldIndex:
+    """
+    STRtree over the level-2 water ROIs linked to a water location, with
+    prepared polygons, so scooping points are matched to their waterfield
+    with one bulk point-in-polygon query. Geometry is in [lat, lon] space,
+    like the stored ROI coordinates.
+    """
 
-    airfield_dict, is_full_dict, waterfield_dict = get_lastest_aircraft_data()
-    water_bombers_dict = get_water_bombers()
+    def __init__(self, polygons, refs):
+        import shapely
+        self.refs = list(refs)
+        self.polygons = np.array(polygons, dtype=object)
+        shapely.prepare(self.polygons)
+        self.tree = shapely.STRtree(self.polygons)
+
+    @classmethod
+    def load(cls, session):
+        """Linked water ROIs and their location ref, in a single joined query."""
+        from shapely.geometry import Polygon
+        rows = session.query(
+            migrate.RegionOfInterest.id,
+            migrate.RegionOfInterest.geometry,
+            migrate.WaterLocation.ref
+        ).join(
+            migrate.WaterLocation,
+            migrate.RegionOfInterest.water_location_id == migrate.WaterLocation.id
+        ).filter(
+            migrate.RegionOfInterest.type == 'water',
+            migrate.RegionOfInterest.level == 2
+        ).order_by(
+            migrate.RegionOfInterest.id
+        ).all()
+
+        polygons, refs = [], []
+        for row in rows:
+            try:
+                coords = json.loads(row.geometry)
+                if len(coords) >= 3:
+                    polygons.append(Polygon(coords))
+                    refs.append(row.ref)
+            except Exception as e:
+                logger.debug(f"Skipping water ROI {row.id}: {e}")
+        return cls(polygons, refs)
+
+    def query(self, lats, lons):
+        """Index into self.refs of the first ROI containing each point, -1 if none."""
+        import shapely
+        from geocoder import first_hit
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        if not self.refs or len(lats) == 0:
+            return np.full(len(lats), -1, dtype=np.intp)
+
+        pts = shapely.points(lats, lons)  # [lat,lon] space
+        point_idx, roi_idx = self.tree.query(pts, predicate='within')
+        return first_hit(len(lats), point_idx, roi_idx)
+
+def _unprocessed_filter(icao_filter=None):
+    """ Filter clauses of get_unprocessed_points, optionally limited to some aircraft. """
+    ft = migrate.FlightTelemetry
+    clauses = [
+        ft.is_processed == False,
+        or_(
+            and_(
+                ft.altitude_agl_ft != None,
+                ft.baro_altitude_ft != None,
+                ft.altitude_agl_ft < 60000
+            ),
+            ft.on_ground == True
+        )
+    ]
+    if icao_filter is not None:
+        clauses.append(ft.icao24.in_(list(icao_filter)))
+    return clauses
 
-    # Load aircraft type for all tracked aircraft — used for per-type low-pass threshold
-    aircraft_type_dict = {
-        row.icao24: row.aircraft_type
-        for row in db.query(migrate.TrackedAircraft.icao24, migrate.TrackedAircraft.aircraft_type,
-                            migrate.TrackedAircraft.sea_landing).all()
-    }
-    # Also build sea_landing lookup to avoid per-point DB queries
-    sea_landing_dict = {
-        row.icao24: row.sea_landing
-        for row in db.query(migrate.TrackedAircraft.icao24, migrate.TrackedAircraft.sea_landing).all()
+def fetch_unprocessed_columns(session, icao_filter=None):
+    """
+    Unprocessed points (same filter as get_unprocessed_points) as NumPy
+    columns, ordered by aircraft then time. NULL floats become NaN.
+    """
+    ft = migrate.FlightTelemetry
+    rows = session.query(
+        ft.icao24, ft.timestamp, ft.lat, ft.lon, ft.on_ground, ft.baro_altitude_ft, ft.altitude_agl_ft
+    ).filter(
+        *_unprocessed_filter(icao_filter)
+    ).order_by(
+        ft.icao24,
+        ft.timestamp
+    ).all()
+
+    icao24, timestamp, lat, lon, on_ground, baro_ft, agl_ft = zip(*rows) if rows else ([],) * 7
+    return {
+        "icao24":           np.array(icao24, dtype=object),
+        "timestamp":        np.array(timestamp, dtype=np.int64),
+        "lat":              np.array(lat, dtype=float),
+        "lon":              np.array(lon, dtype=float),
+        "on_ground":        np.array([bool(g) for g in on_ground], dtype=bool),
+        "baro_altitude_ft": np.array(baro_ft, dtype=float),
+        "altitude_agl_ft":  np.array(agl_ft, dtype=float),
     }
 
-    count_low_pass = 0
-    count_over_water = 0
-    count_at_airfield = 0
-    count_at_waterfield = 0
+def _ffill_by_group(values, hit, group_start, fallback):
+    """
+    Per-aircraft forward fill: for each row, the value of the latest hit row at
+    or before it within the same group, or the group's fallback if none yet.
+    """
+    last = np.where(hit, np.arange(len(hit)), -1)
+    np.maximum.accumulate(last, out=last)
+    own = last >= group_start   # a hit from an earlier aircraft does not count
+    return np.where(own, values[np.maximum(last, 0)], fallback)
+
+def label_points(cols, airfield_hit, water_hit, airfield_dict, is_full_dict, waterfield_dict,
+                 water_bombers, helicopters, threshold_ft=750, helicopter_threshold_ft=500,
+                 water_threshold_ft=10, airfield_alt_threshold=900):
+    """
+    Columnar flight-phase labeling kernel — pure NumPy, no DB access.
+
+    cols:          point columns as returned by fetch_unprocessed_columns (any order)
+    airfield_hit:  per point, ICAO of the nearest airfield within radius, or None
+    water_hit:     per point, ref of the water ROI containing it for seaplane
+                   points low enough to scoop, or None
+    airfield_dict / is_full_dict / waterfield_dict:
+                   last known state per icao24 before this batch
+    water_bombers / helicopters: sets of icao24
+
+    Returns one array per label column, aligned with the input rows, plus
+    'at_waterfield' (rows where a waterfield was detected).
+    """
+    n = len(cols["icao24"])
+    uniq, inv = np.unique(cols["icao24"], return_inverse=True)
+
+    # Process per aircraft in time order; results are scattered back at the end
+    order = np.lexsort((cols["timestamp"], inv))
+    inv = inv[order]
+    on_ground = cols["on_ground"][order]
+    baro_ft = cols["baro_altitude_ft"][order]
+    agl_ft = cols["altitude_agl_ft"][order]
+    airfield_hit = np.asarray(airfield_hit, dtype=object)[order]
+    water_hit = np.asarray(water_hit, dtype=object)[order]
+
+    group_start = np.zeros(n, dtype=np.intp)
+    if n:
+        starts = np.flatnonzero(np.r_[True, inv[1:] != inv[:-1]])
+        group_start = np.repeat(starts, np.diff(np.r_[starts, n]))
+
+    # Per-aircraft lookups, broadcast to rows through the inverse index
+    def per_aircraft(fn, dtype=object):
+        return np.array([fn(icao) for icao in uniq], dtype=dtype)[inv]
+
+    is_bomber = per_aircraft(lambda icao: icao in water_bombers, bool)
+    lp_threshold = per_aircraft(lambda icao: helicopter_threshold_ft if icao in helicopters else threshold_ft, float)
+    prev_full = per_aircraft(lambda icao: is_full_dict.get(icao))
+    prev_full = np.where(prev_full == None, is_bomber, prev_full).astype(bool)
+    prev_airfield = per_aircraft(lambda icao: airfield_dict.get(icao))
+    prev_waterfield = per_aircraft(lambda icao: waterfield_dict.get(icao))
+
+    agl_known = ~np.isnan(agl_ft)
+    with np.errstate(invalid='ignore'):
+        # 1. Proximity (highest priority)
+        at_airfield = (airfield_hit != None) & (on_ground | (agl_known & (agl_ft <= airfield_alt_threshold)))
+        away = ~at_airfield
+
+        # 2. Phases — only when not at an airfield
+        is_over_water = away & ~np.isnan(baro_ft) & agl_known & (np.abs(baro_ft - agl_ft) < water_threshold_ft)
+        is_low_pass = away & agl_known & (agl_ft <= lp_threshold)
+
+    # Refill at an airfield (water bombers only), emptied by a low pass
+    is_full = np.where(at_airfield, is_bomber, np.where(is_low_pass, False, prev_full))
+
+    # 3. Inheritance — latest airfield / waterfield seen so far for this aircraft
+    latest_airfield = _ffill_by_group(airfield_hit, at_airfield, group_start, prev_airfield)
+    at_waterfield = away & (water_hit != None)
+    latest_waterfield = _ffill_by_group(water_hit, at_waterfield, group_start, prev_waterfield)
+    latest_waterfield = np.where(at_airfield, None, latest_waterfield)
+
+    labels = {
+        "at_airfield":       at_airfield,
+        "is_over_water":     is_over_water,
+        "is_low_pass":       is_low_pass,
+        "is_full":           is_full,
+        "latest_airfield":   latest_airfield,
+        "latest_waterfield": latest_waterfield,
+        "at_waterfield":     at_waterfield,
+    }
+    result = {}
+    for name, values in labels.items():
+        result[name] = np.empty_like(values)
+        result[name][order] = values
+    return result
+
+def _label_partition(session, icao_filter=None, threshold_ft=750, helicopter_threshold_ft=500, water_threshold_ft=10,
+                     airfield_radius=3.0, airfield_alt_threshold=900, waterfield_alt_threshold=200):
+    """
+    Labels the unprocessed points of the given aircraft (all if None) and
+    commits. Returns per-label counts.
+    """
+    cols = fetch_unprocessed_columns(session, icao_filter)
+    n = len(cols["icao24"])
+    if not n:
+        return Counter()
+
+    # Spatial indexes, built once for the whole run (kept across runs by the daemon)
+    airfield_index = _cached_reference(session, "airfields", "airfields", lambda: AirfieldIndex(
+        session.query(migrate.Airfield.icao, migrate.Airfield.lat, migrate.Airfield.lon).all()
+    ))
+    waterfield_index = _cached_reference(session, "waterfields", "waterfields", lambda: WaterfieldIndex.load(session))
+
+    airfield_dict, is_full_dict, waterfield_dict = get_lastest_aircraft_data(session)
+
+    def load_aircraft():
+        # Aircraft type (per-type low-pass threshold) and sea_landing in one query
+        aircraft = session.query(
+            migrate.TrackedAircraft.icao24,
+            migrate.TrackedAircraft.aircraft_type,
+            migrate.TrackedAircraft.sea_landing
+        ).all()
+        return (
+            set(get_water_bombers(session)),
+            {row.icao24 for row in aircraft if row.aircraft_type == 'helicopter'},
+            {row.icao24 for row in aircraft if row.sea_landing},
+        )
 
-    # Runs through every new point
-    for p in points:
+    water_bombers, helicopters, seaplanes = _cached_reference(session, "aircraft", "aircraft", load_aircraft)
+
+    # Nearest airfield within radius for every point, in one vectorized query
+    airfield_icao = np.array([af.icao for af in airfield_index.airfields] + [None], dtype=object)
+    airfield_hit = airfield_icao[airfield_index.query(cols["lat"], cols["lon"], airfield_radius)]
+
+    # Waterfield for every seaplane point low enough to be scooping, in one bulk query
+    with np.errstate(invalid='ignore'):
+        scooping = np.array([icao in seaplanes for icao in cols["icao24"]], dtype=bool) \
+                   & (cols["altitude_agl_ft"] <= waterfield_alt_threshold)
+    refs = np.array(waterfield_index.refs + [None], dtype=object)
+    water_hit = np.full(n, None, dtype=object)
+    water_hit[scooping] = refs[waterfield_index.query(cols["lat"][scooping], cols["lon"][scooping])]
+
+    labels = label_points(
+        cols, airfield_hit, water_hit, airfield_dict, is_full_dict, waterfield_dict,
+        water_bombers, helicopters,
+        threshold_ft=threshold_ft,
+        helicopter_threshold_ft=helicopter_threshold_ft,
+        water_threshold_ft=water_threshold_ft,
+        airfield_alt_threshold=airfield_alt_threshold,
+    )
 
-        p.at_airfield = False
-        p.is_over_water = False
-        p.is_low_pass = False
+    # Write back with one UPDATE ... FROM unnest(...) per chunk, single transaction
+    for chunk_start in range(0, n, LABEL_WRITE_CHUNK):
+        chunk = slice(chunk_start, chunk_start + LABEL_WRITE_CHUNK)
+        bulk_update_telemetry(
+            session,
+            cols["icao24"][chunk],
+            cols["timestamp"][chunk],
+            at_airfield=labels["at_airfield"][chunk],
+            is_over_water=labels["is_over_water"][chunk],
+            is_low_pass=labels["is_low_pass"][chunk],
+            is_full=labels["is_full"][chunk],
+            latest_airfield=labels["latest_airfield"][chunk],
+            latest_waterfield=labels["latest_waterfield"][chunk],
+            is_processed=np.ones(len(cols["icao24"][chunk]), dtype=bool),
+        )
+    session.execute(UPSERT_AIRCRAFT_STATE_SQL, aircraft_state_from_batch(cols, labels))
+    session.commit()
+
+    return Counter(
+        points=n,
+        low_pass=int(labels["is_low_pass"].sum()),
+        over_water=int(labels["is_over_water"].sum()),
+        at_airfield=int(labels["at_airfield"].sum()),
+        at_waterfield=int(labels["at_waterfield"].sum()),
+    )
 
-        p.is_full = is_full_dict.get(p.icao24)
-        if p.is_full is None:
-            p.is_full = p.icao24 in water_bombers_dict
+def partition_by_load(counts, parts):
+    """
+    Splits {icao24: point_count} into at most `parts` lists of aircraft with
+    roughly equal point totals (largest first, into the lightest partition).
+    """
+    heap = [(0, i, []) for i in range(min(parts, len(counts)))]
+    for icao, count in sorted(counts.items(), key=lambda kv: -kv[1]):
+        load, i, icaos = heapq.heappop(heap)
+        icaos.append(icao)
+        heapq.heappush(heap, (load + count, i, icaos))
+    return [icaos for _, _, icaos in sorted(heap, key=lambda h: h[1])]
+
+_worker_session = None
+
+def _init_label_worker():
+    """ Process-pool initializer: drop pooled connections inherited from the parent, open a session. """
+    global _worker_session
+    get_engine().dispose(close=False)
+    _worker_session = Session()
+
+def _label_worker(icao_filter, params):
+    try:
+        return _label_partition(_worker_session, icao_filter, **params)
+    except Exception:
+        _worker_session.rollback()
+        raise
 
-        # Per-type low-pass threshold
-        ac_type = aircraft_type_dict.get(p.icao24)
-        lp_threshold = helicopter_threshold_ft if ac_type == 'helicopter' else threshold_ft
+def label_flight_phases(threshold_ft=750, helicopter_threshold_ft=500, water_threshold_ft=10, airfield_radius=3.0, airfield_alt_threshold=900, waterfield_alt_threshold=200, workers=1):
+    """
+    Labels all unprocessed points. With workers > 1 the aircraft are split
+    into point-balanced partitions labeled in a process pool, each worker with
+    its own DB session — aircraft are independent, and each partition keeps
+    per-aircraft timestamp order.
+    """
+    start = time.perf_counter()
+    params = dict(
+        threshold_ft=threshold_ft,
+        helicopter_threshold_ft=helicopter_threshold_ft,
+        water_threshold_ft=water_threshold_ft,
+        airfield_radius=airfield_radius,
+        airfield_alt_threshold=airfield_alt_threshold,
+        waterfield_alt_threshold=waterfield_alt_threshold,
+    )
 
-        # 1. Proximity Check (Highest priority)
-        nearby_af = proximity_check(p, airfields, airfield_radius, airfield_alt_threshold)
+    seed_aircraft_state()
 
-        if nearby_af:
-            p.at_airfield = True
-            p.latest_airfield = nearby_af.icao
-            airfield_dict[p.icao24] = nearby_af.icao
-            p.latest_waterfield = None
-            p.is_full = True if p.icao24 in water_bombers_dict else False
-            count_at_airfield += 1
+    if workers > 1:
+        ft = migrate.FlightTelemetry
+        counts = dict(
+            db.query(ft.icao24, func.count()).filter(*_unprocessed_filter()).group_by(ft.icao24).all()
+        )
+        partitions = partition_by_load(counts, workers)
+        totals = Counter()
+        if partitions:
+            logger.info(f"Labeling {sum(counts.values())} points of {len(counts)} aircraft across {len(partitions)} workers...")
+            with ProcessPoolExecutor(max_workers=len(partitions), initializer=_init_label_worker) as pool:
+                for result in pool.map(_label_worker, partitions, [params] * len(partitions)):
+                    totals.update(result)
+    else:
+        totals = _label_partition(db, **params)
 
-        # 2. Inheritance Logic (If not currently at an airfield)
-        else:
-            # Check if we already found an airfield for this plane in this batch
-            if p.icao24 in airfield_dict:
-                p.latest_airfield = airfield_dict[p.icao24]
-            else:
-                p.latest_airfield = None
-
-            # 3. Label Phase (Only if NOT at an airfield)
-            if p.baro_altitude_ft is not None and p.altitude_agl_ft is not None and abs(p.baro_altitude_ft - p.altitude_agl_ft) < water_threshold_ft:
-                p.is_over_water = True
-                count_over_water += 1
-
-            if p.altitude_agl_ft is not None and p.altitude_agl_ft <= lp_threshold:
-                p.is_low_pass = True
-                count_low_pass += 1
-                p.is_full = False
-
-            # Waterfield check — seaplane inside a linked water ROI below threshold
-            p.latest_waterfield = waterfield_dict.get(p.icao24)  # inherit by default
-
-            if sea_landing_dict.get(p.icao24) and p.altitude_agl_ft is not None and p.altitude_agl_ft <= waterfield_alt_threshold:
-                pt = Point(p.lat, p.lon)  # [lat,lon] space
-                for poly, ref in water_roi_polys:
-                    if poly.contains(pt):
-                        p.latest_waterfield = ref
-                        waterfield_dict[p.icao24] = ref
-                        count_at_waterfield += 1
-                        break
-            else:
-                p.latest_waterfield = waterfield_dict.get(p.icao24)
-
-        p.is_processed = True
+    if not totals["points"]:
+        logger.debug("No new points to label.")
+        return
 
-    db.commit()
     logger.debug(
-        f"Labeling complete: {count_low_pass} Low Pass, {count_over_water} Over Water, "
-        f"{count_at_airfield} near Airfields, {count_at_waterfield} near Waterfields."
+        f"Labeling complete: {totals['low_pass']} Low Pass, {totals['over_water']} Over Water, "
+        f"{totals['at_airfield']} near Airfields, {totals['at_waterfield']} near Waterfields "
+        f"({totals['points']} points in {time.perf_counter() - start:.1f}s)."
     )
 
 def detect_regions_of_interest_clustered(min_samples=5, distance_meters=200, type='fire'):
+    from sklearn.cluster import DBSCAN
+    from shapely.geometry import Polygon, MultiPoint
     cutoff_timestamp = int((datetime.now() - timedelta(days=90)).timestamp())
 
     if type == 'fire':
@@ -537,6 +1172,8 @@ def detect_regions_of_interest_clustered(min_samples=5, distance_meters=200, typ
     db.commit()
 
 def grow_and_level_up_rois(starting_level=1, buffer_km=1.0, type='fire'):
+    from shapely.geometry import Polygon, Point
+    from shapely.ops import unary_union
     rois = db.query(migrate.RegionOfInterest).filter(
         migrate.RegionOfInterest.level == starting_level,
         migrate.RegionOfInterest.type == type
@@ -663,39 +1300,137 @@ def grow_and_level_up_rois(starting_level=1, buffer_km=1.0, type='fire'):
         f"removed: {len(stale_rois)})."
     )
 
+# Promote each aircraft's latest processed timestamp (kept in aircraft_state by
+# the labeling stage) to tracked_aircraft in one statement
+SYNC_AIRCRAFT_METADATA_SQL = text("""
+    UPDATE tracked_aircraft AS t
+    SET last_seen = s.last_seen
+    FROM aircraft_state AS s
+    WHERE t.icao24 = s.icao24
+      AND s.last_seen IS NOT NULL
+      AND t.last_seen IS DISTINCT FROM s.last_seen
+""")
+
 def sync_aircraft_metadata():
     logger.info("Promoting latest telemetry metadata to aircraft table...")
-    
-    # Get the latest point for every aircraft
-    # This query finds the maximum ID for each ICAO24
-    subquery = db.query(
-        migrate.FlightTelemetry.icao24,
-        func.max(migrate.FlightTelemetry.timestamp).label("max_ts")
-    ).filter(
-        migrate.FlightTelemetry.is_processed == True
-    ).group_by(
-        migrate.FlightTelemetry.icao24
-    ).subquery()
-
-    latest_points = db.query(migrate.FlightTelemetry).join(
-        subquery,
-        (migrate.FlightTelemetry.icao24 == subquery.c.icao24) &
-        (migrate.FlightTelemetry.timestamp == subquery.c.max_ts)
-    ).all()
-
-    sync_count = 0
-    for p in latest_points:
-        # 2. Update the corresponding aircraft record
-        ac_record = db.query(migrate.TrackedAircraft).filter(
-            migrate.TrackedAircraft.icao24 == p.icao24
-        ).first()
-        
-        if ac_record:
-            ac_record.last_seen = p.timestamp
-            sync_count += 1
+    start = time.perf_counter()
 
+    seed_aircraft_state()
+    sync_count = db.execute(SYNC_AIRCRAFT_METADATA_SQL).rowcount
     db.commit()
-    logger.info(f"Sync complete: {sync_count} aircraft updated with their latest status.")
+
+    logger.info(
+        f"Sync complete: {sync_count} aircraft updated with their latest status "
+        f"({(time.perf_counter() - start) * 1000:.0f} ms)."
+    )
+
+class CollectorDaemon:
+    """
+    Resident collector: runs collect → backfill → AGL → label → metadata sync
+    every `interval` seconds instead of one cold start per cron tick.
+
+    Kept in memory between cycles: the fleet list and each aircraft's newest
+    stored timestamp (advanced by orchestrate_sync, reloaded when the fleet
+    fingerprint changes or every resync_interval seconds), and, through
+    _reference_cache, the airfield/waterfield indexes and aircraft sets, each
+    rebuilt only when its source tables change.
+    """
+
+    def __init__(self, interval=DAEMON_INTERVAL, workers=1, fr24_interval=0, resync_interval=DAEMON_RESYNC_INTERVAL):
+        global _reference_cache
+        if _reference_cache is None:
+            _reference_cache = {}
+        self.interval = interval
+        self.workers = workers
+        self.fr24_interval = fr24_interval
+        self.resync_interval = resync_interval
+        self.stop_event = threading.Event()
+        self.fleet = []
+        self.latest_timestamps = {}
+        self.active = []
+        self.timings = {}
+        self._fleet_fingerprint = None
+        self._synced_at = None
+        self._fr24_at = None
+        self._token_expires = 0.0
+
+    def stop(self, *_):
+        logger.info("Stop requested, finishing the current stage...")
+        self.stop_event.set()
+
+    def refresh_fleet(self):
+        """ Reload fleet and timestamps if tracked_aircraft changed or the resync interval passed. """
+        fingerprint = _reference_fingerprint(db, "fleet")
+        now = time.monotonic()
+        if (fingerprint == self._fleet_fingerprint and self._synced_at is not None
+                and now - self._synced_at < self.resync_interval):
+            return False
+        self.fleet = get_all_tracked_icao24(db, False)
+        self.latest_timestamps = get_latest_timestamps(db, self.fleet)
+        self._fleet_fingerprint = fingerprint
+        self._synced_at = now
+        logger.info(f"Fleet loaded: {len(self.fleet)} aircraft.")
+        return True
+
+    def refresh_token(self):
+        """ Renew OPENSKY_CLIENT_TOKEN a minute before it expires (the cron runner gets one per run). """
+        client_id, client_secret = os.getenv('OPEN_SKY_CLIENT_ID'), os.getenv('OPEN_SKY_CLIENT_SECRET')
+        if not (client_id and client_secret) or time.monotonic() < self._token_expires:
+            return
+        try:
+            token, expires_in = fetch_opensky_token(client_id, client_secret)
+        except Exception as e:
+            logger.error(f"OpenSky token renewal failed, keeping the current one: {e}")
+            return
+        os.environ['OPENSKY_CLIENT_TOKEN'] = token
+        self._token_expires = time.monotonic() + expires_in - 60
+        logger.info("OpenSky token renewed.")
+
+    def _collect(self):
+        self.refresh_token()
+        now = time.monotonic()
+        if self.fr24_interval and (self._fr24_at is None or now - self._fr24_at >= self.fr24_interval):
+            update_fr24_cache()
+            self._fr24_at = now
+        update_adsb_cache()
+        self.active = orchestrate_sync(icao_list=self.fleet, latest_timestamps=self.latest_timestamps)
+
+    def _stage(self, name, fn, *args, **kwargs):
+        if self.stop_event.is_set():
+            return
+        start = time.perf_counter()
+        fn(*args, **kwargs)
+        self.timings[name] = time.perf_counter() - start
+
+    def run_cycle(self):
+        """ One pass over all stages. A failing stage ends the cycle; the next one starts clean. """
+        self.timings = {}
+        start = time.perf_counter()
+        try:
+            self._stage("fleet", self.refresh_fleet)
+            self._stage("collect", self._collect)
+            if self.active:
+                self._stage("backfill", backfill_telemetry, self.active)
+                self._stage("agl", backfill_agl)
+                self._stage("label", label_flight_phases, workers=self.workers)
+                self._stage("sync", sync_aircraft_metadata)
+        except Exception as e:
+            logger.exception(f"Daemon cycle failed: {e}")
+        finally:
+            db.close()   # no transaction left open while sleeping
+
+        stages = ", ".join(f"{name} {seconds:.1f}s" for name, seconds in self.timings.items())
+        logger.info(f"Cycle done in {time.perf_counter() - start:.1f}s ({stages}).")
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        logger.info(f"Collector daemon started: every {self.interval}s, {self.workers} labeling worker(s).")
+        while not self.stop_event.is_set():
+            started = time.monotonic()
+            self.run_cycle()
+            self.stop_event.wait(max(0.0, self.interval - (time.monotonic() - started)))
+        logger.info("Collector daemon stopped.")
 
 if __name__ == "__main__":
 
@@ -806,13 +1541,54 @@ if __name__ == "__main__":
         help="Scan for new firefighting aircraft not yet in the DB"
     )
 
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="With --fr24-cache: report planned FR24 calls and remaining budget without calling the API"
+    )
+
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Label flight phases in N parallel processes, partitioned by aircraft (default: 1)"
+    )
+
     parser.add_argument(
         "--location",
         action="store_true",
         help="Resolve country/ocean of each aircraft's last known position (run once daily)"
     )
 
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Stay resident and run the full sync pipeline every --interval seconds"
+    )
+
+    parser.add_argument(
+        "--interval",
+        type=int,
+        default=DAEMON_INTERVAL,
+        metavar="SECONDS",
+        help=f"With --daemon: seconds between cycle starts (default: {DAEMON_INTERVAL})"
+    )
+
+    parser.add_argument(
+        "--fr24-interval",
+        type=int,
+        default=0,
+        metavar="SECONDS",
+        help="With --daemon: also refresh the FR24 cache every N seconds (default: 0, off)"
+    )
+
     args = parser.parse_args()
+    atexit.register(log_connection_stats)
+
+    if args.daemon:
+        CollectorDaemon(interval=args.interval, workers=args.workers, fr24_interval=args.fr24_interval).run()
+        sys.exit(0)
 
     if args.adsb_cache:
         update_adsb_cache()
@@ -833,6 +1609,7 @@ if __name__ == "__main__":
         sys.exit(0)
 
     if args.firms_sync:
+        from firmsCollector import run_firms_sync
         def _parse_date(s):
             return s.split('T')[0].split(' ')[0]  # accept YYYY-MM-DD or YYYY-MM-DDTHH:MM:SS
         run_firms_sync(
@@ -852,6 +1629,7 @@ if __name__ == "__main__":
             hours=args.hours,
             dt_from_override=_parse_dt(args.start) if args.start else None,
             dt_to_override=_parse_dt(args.end) if args.end else None,
+            dry_run=args.dry_run,
         )
         sys.exit(0)
 
@@ -886,13 +1664,13 @@ if __name__ == "__main__":
 
     if args.AGL:
         backfill_agl()
-        label_flight_phases()
+        label_flight_phases(workers=args.workers)
     else:
         if len(icao_list) > 0:
 
             backfill_telemetry(icao_list)
             backfill_agl()
-            label_flight_phases()
+            label_flight_phases(workers=args.workers)
             sync_aircraft_metadata()
 
         
@@ -2,10 +2,12 @@ import math
 import migrate
 import requests
 import os
+import glob
 import time
 import logging
+import numpy as np
 import rasterio
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -44,6 +46,130 @@ class ElevationProvider:
         """Cleanly close the file handle."""
         self.dataset.close()
 
+class DemTile:
+    """One north-up DEM raster held in memory, sampled with NumPy index arithmetic."""
+
+    def __init__(self, data, left: float, top: float, xres: float, yres: float, name: str = ""):
+        self.data = data
+        self.left = left
+        self.top = top
+        self.xres = xres
+        self.yres = yres
+        self.name = name
+        self.height, self.width = data.shape
+        self.right = left + self.width * xres
+        self.bottom = top - self.height * yres
+
+    @classmethod
+    def from_file(cls, file_path: str, mmap: bool = True) -> "DemTile":
+        """
+        Open a GeoTIFF tile. With mmap=True the raster is converted once to a raw
+        .npy sidecar next to the .tif and memory-mapped, so later loads cost no
+        GDAL read and pages are shared between processes.
+        """
+        with rasterio.open(file_path) as dataset:
+            t = dataset.transform
+            sidecar = file_path + ".npy"
+            data = None
+            if mmap:
+                try:
+                    if not os.path.exists(sidecar) or os.path.getmtime(sidecar) < os.path.getmtime(file_path):
+                        tmp = f"{sidecar}.{os.getpid()}.tmp"
+                        with open(tmp, "wb") as f:
+                            np.save(f, dataset.read(1))
+                        os.replace(tmp, sidecar)   # atomic — concurrent loaders never see a partial file
+                        logger.info(f"Wrote DEM sidecar {os.path.basename(sidecar)}")
+                    data = np.load(sidecar, mmap_mode="r")
+                except OSError as e:
+                    logger.warning(f"Could not use DEM sidecar for {file_path}, reading in memory: {e}")
+            if data is None:
+                data = dataset.read(1)
+        return cls(data, left=t.c, top=t.f, xres=t.a, yres=-t.e, name=os.path.basename(file_path))
+
+    def sample(self, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        """Elevation in metres for each point, NaN where the tile has no pixel."""
+        # Same floor() convention as rasterio's dataset.index()
+        rows = np.floor((self.top - lats) / self.yres)
+        cols = np.floor((lons - self.left) / self.xres)
+        inside = (rows >= 0) & (rows < self.height) & (cols >= 0) & (cols < self.width)
+
+        out = np.full(lats.shape, np.nan)
+        out[inside] = self.data[rows[inside].astype(np.intp), cols[inside].astype(np.intp)]
+        return out
+
+
+class ElevationTileSet:
+    """
+    All DEM tiles of a directory, loaded once and sampled for whole coordinate
+    arrays at a time. Tiles are tried in file-name order, first match wins —
+    same precedence as the former per-provider scan in elevation_api.
+
+    A 1° grid index (cell → tiles overlapping it) keeps lookups independent of
+    the number of tiles: a point only ever tests the one or two tiles of its cell.
+    """
+
+    CELL_DEG = 1.0
+
+    def __init__(self, tiles: List[DemTile]):
+        self.tiles = tiles
+        self.index = {}
+        for i, tile in enumerate(tiles):
+            # Inclusive of the far edges: a point exactly on a tile's top/right
+            # border floors into the next cell but is still inside that tile
+            for row in range(math.floor(tile.bottom / self.CELL_DEG), math.floor(tile.top / self.CELL_DEG) + 1):
+                for col in range(math.floor(tile.left / self.CELL_DEG), math.floor(tile.right / self.CELL_DEG) + 1):
+                    self.index.setdefault(self._key(row, col), []).append(i)
+
+    @staticmethod
+    def _key(row, col):
+        # Single integer per cell so NumPy can group points with np.unique
+        return (row + 90) * 360 + (col + 180)
+
+    @classmethod
+    def from_dir(cls, data_dir: str, mmap: bool = True) -> "ElevationTileSet":
+        tiles = []
+        for path in sorted(glob.glob(os.path.join(data_dir, "*.tif"))):
+            try:
+                tiles.append(DemTile.from_file(path, mmap=mmap))
+                logger.info(f"Loaded tile: {os.path.basename(path)}")
+            except Exception as e:
+                logger.warning(f"Could not load {path}: {e}")
+        if not tiles:
+            raise RuntimeError(f"No .tif files found in {data_dir}")
+        return cls(tiles)
+
+    def sample(self, lats, lons) -> np.ndarray:
+        """Ground elevation in metres for each (lat, lon), NaN where no tile covers it."""
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        out = np.full(lats.shape, np.nan)
+
+        valid = np.flatnonzero(np.isfinite(lats) & np.isfinite(lons))
+        if valid.size == 0:
+            return out
+
+        keys = self._key(np.floor(lats[valid] / self.CELL_DEG).astype(np.int64),
+                         np.floor(lons[valid] / self.CELL_DEG).astype(np.int64))
+        cells, inverse = np.unique(keys, return_inverse=True)
+        order = np.argsort(inverse, kind="stable")
+        bounds = np.cumsum(np.bincount(inverse, minlength=len(cells)))
+
+        start = 0
+        for cell, end in zip(cells.tolist(), bounds.tolist()):
+            idx = valid[order[start:end]]
+            start = end
+            for i in self.index.get(cell, ()):
+                todo = idx[np.isnan(out[idx])]
+                if todo.size == 0:
+                    break
+                out[todo] = self.tiles[i].sample(lats[todo], lons[todo])
+        return out
+
+    def get_elevation(self, lat: float, lon: float) -> Optional[float]:
+        """Single-point lookup — pure array indexing, None where no tile covers it."""
+        elev = self.sample([lat], [lon])[0]
+        return None if np.isnan(elev) else float(elev)
+
 # --- Local Test ---
 if __name__ == "__main__":
 
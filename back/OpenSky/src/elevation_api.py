@@ -8,41 +8,35 @@ Endpoints
 ---------
 GET  /elevation?lat=&lon=          → single point
 POST /elevation/batch              → list of {lat, lon} → list of results
+POST /elevation/batch/bin          → packed lat/lon buffer → packed elevations
 
 Run
 ---
     uvicorn elevation_api:app --host 0.0.0.0 --port 8011
 """
 
-import glob
 import os
 import logging
 from typing import Optional, List
 
-from fastapi import FastAPI, HTTPException
+import numpy as np
+from fastapi import FastAPI, HTTPException, Request, Response
 from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
 
-from elevation import ElevationProvider
+from elevation import ElevationTileSet
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # ── Load all .tif tiles at startup ──────────────────────────────────────────
+# Tiles are memory-mapped from .npy sidecars (written on first start) and
+# indexed on a 1° grid — no GDAL call on the request path.
 DATA_DIR = os.getenv("ELEVATION_DATA_DIR", os.path.join(os.path.dirname(__file__), "..", "data"))
 
-_tif_files = sorted(glob.glob(os.path.join(DATA_DIR, "*.tif")))
-if not _tif_files:
-    raise RuntimeError(f"No .tif files found in {DATA_DIR}")
+tiles = ElevationTileSet.from_dir(DATA_DIR)
 
-providers: List[ElevationProvider] = []
-for path in _tif_files:
-    try:
-        providers.append(ElevationProvider(path))
-        logger.info(f"Loaded tile: {os.path.basename(path)}")
-    except Exception as e:
-        logger.warning(f"Could not load {path}: {e}")
-
-logger.info(f"{len(providers)} elevation tile(s) ready")
+logger.info(f"{len(tiles.tiles)} elevation tile(s) ready")
 
 # ── App ──────────────────────────────────────────────────────────────────────
 app = FastAPI(title="Elevation API", version="1.0")
@@ -50,11 +44,7 @@ app = FastAPI(title="Elevation API", version="1.0")
 
 def _query(lat: float, lon: float) -> Optional[float]:
     """Return ground elevation in metres, or None if no tile covers the point."""
-    for p in providers:
-        elev = p.get_elevation(lat, lon)
-        if elev is not None:
-            return elev
-    return None
+    return tiles.get_elevation(lat, lon)
 
 
 # ── Single point ─────────────────────────────────────────────────────────────
@@ -89,19 +79,47 @@ def get_elevation_batch(points: List[Point]):
 
     Example body: [{"lat": 43.75, "lon": 4.42}, {"lat": 41.9, "lon": 12.5}]
     """
-    results = []
-    for p in points:
-        elev_m = _query(p.lat, p.lon)
-        results.append({
+    elev_m = tiles.sample([p.lat for p in points], [p.lon for p in points])
+    return [
+        {
             "lat": p.lat,
             "lon": p.lon,
-            "elevation_m": round(elev_m, 1) if elev_m is not None else None,
-            "elevation_ft": round(elev_m * 3.28084, 1) if elev_m is not None else None,
-        })
-    return results
+            "elevation_m": None if np.isnan(e) else round(e, 1),
+            "elevation_ft": None if np.isnan(e) else round(e * 3.28084, 1),
+        }
+        for p, e in zip(points, elev_m.tolist())
+    ]
+
+
+# ── Batch (binary) ────────────────────────────────────────────────────────────
+BIN_DTYPES = {"f4": "<f4", "f8": "<f8"}
+
+@app.post("/elevation/batch/bin")
+async def get_elevation_batch_bin(request: Request, dtype: str = "f8"):
+    """
+    Binary variant of /elevation/batch for bulk clients (AGL backfill).
+
+    Body:     little-endian lat,lon pairs packed as float32 (dtype=f4) or
+              float64 (dtype=f8, default), i.e. a C-ordered (N, 2) array.
+    Response: N little-endian float32 elevations in metres,
+              NaN where no tile covers the point.
+    """
+    if dtype not in BIN_DTYPES:
+        raise HTTPException(status_code=400, detail=f"dtype must be one of {list(BIN_DTYPES)}")
+
+    body = await request.body()
+    pair_size = 2 * np.dtype(BIN_DTYPES[dtype]).itemsize
+    if len(body) % pair_size:
+        raise HTTPException(status_code=400, detail="Body must contain packed lat,lon pairs")
+    coords = np.frombuffer(body, dtype=BIN_DTYPES[dtype]).reshape(-1, 2)
+
+    # Sampling is CPU-bound — keep it off the event loop
+    elev_m = await run_in_threadpool(tiles.sample, coords[:, 0], coords[:, 1])
+    elev_m = elev_m.astype("<f4")
+    return Response(content=elev_m.tobytes(), media_type="application/octet-stream")
 
 
 # ── Health ────────────────────────────────────────────────────────────────────
 @app.get("/health")
 def health():
-    return {"status": "ok", "tiles_loaded": len(providers)}
+    return {"status": "ok", "tiles_loaded": len(tiles.tiles)}
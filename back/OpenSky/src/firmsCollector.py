@@ -5,7 +5,7 @@ import math
 import time
 import random
 import logging
-import requests
+from httpSession import get_session
 from datetime import datetime, timedelta
 from shapely.geometry import Point, mapping, shape
 from shapely.ops import unary_union
@@ -57,10 +57,10 @@ def _area_ha(polygon):
 
 # ── FIRMS fetch ───────────────────────────────────────────────────────────────
 
-def fetch_firms_csv(bbox, source, date_str, day_range=1):
+def fetch_firms_csv(bbox, source, date_str, day_range=1, session=None):
     url = f"{FIRMS_BASE_URL}/{FIRMS_API_KEY}/{source}/{bbox}/{day_range}/{date_str}"
     logger.debug(f"FIRMS fetch: {url}")
-    resp = requests.get(url, timeout=30)
+    resp = (session or get_session()).get(url, timeout=30)
     resp.raise_for_status()
     lines = resp.text.strip().splitlines()
     if len(lines) < 2:
@@ -0,0 +1,215 @@
+import os
+import json
+import time
+import fcntl
+import shutil
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# One packed record per track point; NaN stands for a missing value
+FR24_TRACK_DTYPE = np.dtype([
+    ('ts',        '<i8'),
+    ('lat',       '<f8'),
+    ('lon',       '<f8'),
+    ('alt_m',     '<f8'),
+    ('track',     '<f8'),
+    ('on_ground', 'u1'),
+])
+
+
+def points_to_records(points):
+    """[[ts, lat, lon, alt_m, track, on_ground], ...] → structured array (None → NaN)."""
+    records = np.zeros(len(points), dtype=FR24_TRACK_DTYPE)
+    if len(points):
+        ts, lat, lon, alt, track, on_ground = zip(*points)
+        records['ts'] = ts
+        records['lat'] = np.array(lat, dtype=float)
+        records['lon'] = np.array(lon, dtype=float)
+        records['alt_m'] = np.array(alt, dtype=float)
+        records['track'] = np.array(track, dtype=float)
+        records['on_ground'] = np.array(on_ground, dtype=bool)
+    return records
+
+
+def records_to_points(records):
+    """Structured array → [[ts, lat, lon, alt_m, track, on_ground], ...] with NaN back to None."""
+    def column(name):
+        values = records[name].astype(float)
+        return np.where(np.isnan(values), None, values).tolist()
+
+    return [
+        list(p) for p in zip(
+            records['ts'].tolist(), column('lat'), column('lon'),
+            column('alt_m'), column('track'), records['on_ground'].astype(bool).tolist(),
+        )
+    ]
+
+
+class FR24TrackCache:
+    """
+    FR24 track cache as a directory: one raw <icao24>.bin file of packed
+    FR24_TRACK_DTYPE records per aircraft, read back memory-mapped, and an
+    index.json with the legs stored in each file:
+
+        {icao24: {"fr24_id": <latest leg>,
+                  "legs": [{"fr24_id", "start", "count", "ended", "last_ts", "on_ground"}]}}
+
+    Legs are appended as they are fetched, so a long backfill never holds
+    more than one leg in memory. Each run writes a new versioned directory
+    (<directory>.v<ns>, begin()) and commit() atomically repoints the
+    <directory> symlink at it, holding an flock on <directory>.lock so only
+    one writer runs at a time. A reader resolves the symlink once and maps
+    every track file up front, so a swap (and the removal of the old version)
+    never leaves it with an index that does not match its files.
+    """
+
+    INDEX = "index.json"
+    OPEN_ATTEMPTS = 3
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.index, self._tracks = self._open(directory)
+
+    @classmethod
+    def _open(cls, directory):
+        """Index and memory-mapped tracks of the version the cache points at now."""
+        for attempt in range(cls.OPEN_ATTEMPTS):
+            version = os.path.realpath(directory)
+            try:
+                with open(os.path.join(version, cls.INDEX), 'r') as f:
+                    index = json.load(f)
+                return index, {icao: cls._map_track(version, icao, entry) for icao, entry in index.items()}
+            except FileNotFoundError:
+                if version == os.path.realpath(directory):
+                    return {}, {}   # no cache yet
+                # Swapped and removed while we were opening it: retry on the new version
+            except Exception as e:
+                logger.warning(f"Could not read FR24 cache index: {e}")
+                return {}, {}
+        logger.warning("FR24 cache kept changing while being opened; reading it as empty.")
+        return {}, {}
+
+    @classmethod
+    def _map_track(cls, version, icao24, entry):
+        count = sum(leg['count'] for leg in entry.get('legs', []))
+        if not count:
+            return np.zeros(0, dtype=FR24_TRACK_DTYPE)
+        path = cls._bin_path(version, icao24)
+        size = os.path.getsize(path)
+        if size != count * FR24_TRACK_DTYPE.itemsize:
+            logger.warning(f"[{icao24}] FR24 cache: {size} bytes on disk for {count} points, ignoring its track.")
+            return np.zeros(0, dtype=FR24_TRACK_DTYPE)
+        return np.memmap(path, dtype=FR24_TRACK_DTYPE, mode='r', shape=(count,))
+
+    # --- Reading ---
+
+    def icaos(self):
+        return list(self.index)
+
+    def fr24_id(self, icao24):
+        return self.index.get(icao24, {}).get('fr24_id')
+
+    def legs(self, icao24):
+        return self.index.get(icao24, {}).get('legs', [])
+
+    def fr24_ids(self):
+        return [leg['fr24_id'] for icao in self.index for leg in self.legs(icao)]
+
+    def track(self, icao24):
+        """All stored points of an aircraft as a read-only memory-mapped record array."""
+        return self._tracks.get(icao24, np.zeros(0, dtype=FR24_TRACK_DTYPE))
+
+    def leg_track(self, icao24, leg):
+        return self.track(icao24)[leg['start']:leg['start'] + leg['count']]
+
+    def track_since(self, icao24, checkpoints):
+        """Points of an aircraft newer than the checkpoint ({fr24_id: last_ts}) of the leg they belong to."""
+        track = self.track(icao24)
+        keep = np.ones(len(track), dtype=bool)
+        for leg in self.legs(icao24):
+            since = checkpoints.get(leg['fr24_id'])
+            if since is not None:
+                segment = slice(leg['start'], leg['start'] + leg['count'])
+                keep[segment] = track['ts'][segment] > since
+        return track[keep]
+
+    def total_points(self):
+        return sum(leg['count'] for icao in self.index for leg in self.legs(icao))
+
+    # --- Writing ---
+
+    @staticmethod
+    def _bin_path(directory, icao24):
+        return os.path.join(directory, f"{icao24}.bin")
+
+    def begin(self):
+        """Start a new run: legs appended from now on go to a fresh version directory."""
+        self._lock_file = open(f"{self.directory}.lock", 'a')
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+        self._staging = f"{self.directory}.v{time.time_ns()}"
+        os.makedirs(self._staging)
+        self._staged_index = {}
+
+    def append_leg(self, icao24, fr24_id, points, ended=False, last_ts=None, previous=None):
+        """
+        Append one leg's points to the aircraft's file in the staging directory.
+        A leg fetched as a delta may have no points; it then keeps where it stood:
+        the last_ts/on_ground of its `previous` index entry, else last_ts (the checkpoint).
+        """
+        records = points_to_records(points)
+        entry = self._staged_index.setdefault(icao24, {'fr24_id': fr24_id, 'legs': []})
+        start = sum(leg['count'] for leg in entry['legs'])
+        with open(self._bin_path(self._staging, icao24), 'ab') as f:
+            f.write(records.tobytes())
+        if len(records):
+            last_ts, on_ground = int(records['ts'][-1]), bool(records['on_ground'][-1])
+        else:
+            previous = previous or {}
+            known = [ts for ts in (previous.get('last_ts'), last_ts) if ts is not None]
+            last_ts, on_ground = (max(known) if known else None), bool(previous.get('on_ground', False))
+        entry['legs'].append({
+            'fr24_id':   fr24_id,
+            'start':     start,
+            'count':     len(records),
+            'ended':     bool(ended),
+            'last_ts':   last_ts,
+            'on_ground': on_ground,
+        })
+        entry['fr24_id'] = fr24_id
+
+    def commit(self):
+        """Atomically point the cache at the staged run, then drop the versions it replaced."""
+        try:
+            with open(os.path.join(self._staging, self.INDEX), 'w') as f:
+                json.dump(self._staged_index, f)
+
+            if os.path.isdir(self.directory) and not os.path.islink(self.directory):
+                shutil.rmtree(self.directory)   # plain directory left by an older release
+            link = f"{self.directory}.link.tmp"
+            if os.path.lexists(link):
+                os.remove(link)
+            os.symlink(os.path.basename(self._staging), link)
+            os.replace(link, self.directory)
+
+            current = os.path.basename(self._staging)
+            parent = os.path.dirname(os.path.abspath(self.directory))
+            prefix = f"{os.path.basename(self.directory)}.v"
+            for name in os.listdir(parent):
+                if name.startswith(prefix) and name != current:
+                    shutil.rmtree(os.path.join(parent, name), ignore_errors=True)
+        finally:
+            self._release()
+
+        self.index, self._tracks = self._open(self.directory)
+        return self.total_points()
+
+    def abort(self):
+        """Drop the staged run and leave the live cache as it was."""
+        shutil.rmtree(self._staging, ignore_errors=True)
+        self._release()
+
+    def _release(self):
+        fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+        self._lock_file.close()
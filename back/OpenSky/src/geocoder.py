@@ -0,0 +1,90 @@
+import json
+import logging
+import numpy as np
+import shapely
+from shapely.geometry import shape
+
+logger = logging.getLogger(__name__)
+
+_GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+def geohash_encode(lat, lon, precision=6):
+    """Standard geohash of a point; 6 characters is a cell of about 1.2 x 0.6 km."""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit_count, even = [], 0, 0, True
+    while len(chars) < precision:
+        rng, value = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_GEOHASH_BASE32[bits])
+            bits, bit_count = 0, 0
+    return "".join(chars)
+
+def first_hit(n, point_idx, poly_idx):
+    """
+    Per point, the lowest polygon index among the (point, polygon) pairs of an
+    STRtree query — the first matching polygon in input order — or -1.
+    """
+    first = np.full(n, np.iinfo(np.intp).max, dtype=np.intp)
+    np.minimum.at(first, point_idx, poly_idx)
+    return np.where(first == np.iinfo(np.intp).max, -1, first)
+
+class OfflineGeocoder:
+    """
+    Country and sea/ocean polygons in an STRtree, resolving many points with
+    one vectorized point-in-polygon query. Loaded from a GeoJSON
+    FeatureCollection (coordinates in [lon, lat] order, as per the spec).
+
+    When polygons overlap (coastal marine areas), the first feature in the
+    file wins — list countries before seas.
+    """
+
+    NAME_KEYS = ("name", "NAME", "ADMIN")
+
+    def __init__(self, polygons, names):
+        self.names = list(names)
+        self.polygons = np.array(polygons, dtype=object)
+        shapely.prepare(self.polygons)
+        self.tree = shapely.STRtree(self.polygons)
+
+    @classmethod
+    def from_geojson(cls, path):
+        with open(path) as f:
+            features = json.load(f).get("features", [])
+
+        polygons, names = [], []
+        for i, feature in enumerate(features):
+            props = feature.get("properties") or {}
+            name = next((props[k].strip() for k in cls.NAME_KEYS if (props.get(k) or "").strip()), None)
+            try:
+                geometry = shape(feature["geometry"])
+            except Exception as e:
+                logger.debug(f"Skipping geocoder feature {i}: {e}")
+                continue
+            if name and not geometry.is_empty:
+                polygons.append(geometry)
+                names.append(name)
+
+        logger.info(f"OfflineGeocoder loaded {len(names)} polygons from {path}")
+        return cls(polygons, names)
+
+    def lookup(self, lats, lons):
+        """Name of the first polygon containing each point, None where nothing matches."""
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        result = np.full(len(lats), None, dtype=object)
+        if not self.names or len(lats) == 0:
+            return result
+
+        pts = shapely.points(lons, lats)  # GeoJSON [lon, lat] space
+        point_idx, poly_idx = self.tree.query(pts, predicate='within')
+        names = np.array(self.names + [None], dtype=object)
+        return names[first_hit(len(lats), point_idx, poly_idx)]
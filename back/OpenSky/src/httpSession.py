@@ -0,0 +1,103 @@
+import os
+import threading
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+# (connect, read) seconds, used when a call does not pass its own timeout
+HTTP_TIMEOUT = (float(os.getenv("HTTP_CONNECT_TIMEOUT", 5)), float(os.getenv("HTTP_READ_TIMEOUT", 30)))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", 3))
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 16))
+
+# Quota-metered APIs: every attempt must go through the caller's FR24Budget /
+# RateLimiter, so urllib3 never retries these on its own
+METERED_PREFIXES = (
+    "https://opensky-network.org/",
+    "https://fr24api.flightradar24.com/",
+)
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that applies a default timeout to every request."""
+
+    def __init__(self, *args, timeout=HTTP_TIMEOUT, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().send(request, **kwargs)
+
+
+def create_session(retries=HTTP_RETRIES, backoff_factor=0.5, pool_size=HTTP_POOL_SIZE, timeout=HTTP_TIMEOUT,
+                   metered=METERED_PREFIXES):
+    """
+    requests.Session with keep-alive connection pools per host, retries on
+    connection errors and 502/503/504 (429 is left to the callers, which own
+    their rate limits), and a default timeout. requests already negotiates
+    gzip/deflate compression.
+
+    URLs under a `metered` prefix get an adapter without retries: their
+    callers count each attempt against a quota and retry themselves.
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset(["GET", "POST"]),
+        raise_on_status=False,
+    )
+    adapter = TimeoutHTTPAdapter(max_retries=retry, pool_connections=pool_size, pool_maxsize=pool_size, timeout=timeout)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    no_retry = TimeoutHTTPAdapter(max_retries=0, pool_connections=pool_size, pool_maxsize=pool_size, timeout=timeout)
+    for prefix in metered:
+        session.mount(prefix, no_retry)
+    return session
+
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session():
+    """The process-wide shared session, created on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = create_session()
+        return _session
+
+
+def connection_stats(session=None):
+    """
+    Connections opened vs requests made, per host and in total, read from the
+    session's urllib3 pools. Pools evicted from the pool manager are not counted.
+    """
+    session = session or get_session()
+    hosts = {}
+    for adapter in set(session.adapters.values()):
+        for key in list(adapter.poolmanager.pools.keys()):
+            pool = adapter.poolmanager.pools.get(key)
+            if pool is not None:
+                hosts[f"{key.key_scheme}://{key.key_host}"] = {
+                    "connections": pool.num_connections,
+                    "requests": pool.num_requests,
+                }
+    return {
+        "connections": sum(h["connections"] for h in hosts.values()),
+        "requests": sum(h["requests"] for h in hosts.values()),
+        "hosts": hosts,
+    }
+
+
+def log_connection_stats(session=None):
+    stats = connection_stats(session)
+    if stats["requests"]:
+        per_host = ", ".join(f"{host}: {h['requests']}/{h['connections']}" for host, h in stats["hosts"].items())
+        logger.info(f"HTTP: {stats['requests']} requests over {stats['connections']} connections ({per_host}).")
+    return stats
@@ -1,6 +1,6 @@
 import os
 import sys
-from sqlalchemy import create_engine, Column, String, Integer, Float, Boolean, DateTime, CheckConstraint, Text, ForeignKey, func, Numeric
+from sqlalchemy import create_engine, Column, String, Integer, Float, Boolean, DateTime, CheckConstraint, Text, ForeignKey, Index, func, Numeric
 from sqlalchemy.orm import declarative_base, sessionmaker
 import logging
 logger = logging.getLogger(__name__)
@@ -14,14 +14,34 @@ db_opts = os.getenv('DB_OPTIONS', 'sslmode=disable')
 
 db_url = f"postgresql://{user}:{password}@{db_host}/{db_name}?{db_opts}"
 
-# 2. Create the Engine and Session Factory
-# These must be at the top level so dataCollector.py can import them
-engine = create_engine(
-    db_url,
-    pool_pre_ping=True, 
-    pool_recycle=3600
-)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# 2. Engine and Session Factory
+# The engine (and its DB driver) is only created on first use, so importing
+# the models costs nothing; SessionLocal() and migrate.engine both create it.
+_engine = None
+
+def get_engine():
+    """ The module engine, created (and bound to SessionLocal) on first call. """
+    global _engine
+    if _engine is None:
+        _engine = create_engine(
+            db_url,
+            pool_pre_ping=True,
+            pool_recycle=3600
+        )
+        SessionLocal.configure(bind=_engine)
+    return _engine
+
+def __getattr__(name):
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+class _LazySessionmaker(sessionmaker):
+    def __call__(self, **local_kw):
+        get_engine()
+        return super().__call__(**local_kw)
+
+SessionLocal = _LazySessionmaker(autocommit=False, autoflush=False)
 Base = declarative_base()
 
 class TrackedAircraft(Base):
@@ -79,7 +99,36 @@ class FlightTelemetry(Base):
     location = Column(String(100))
 
     source = Column(String(20), default='opensky', nullable=False)
+
+    __table_args__ = (
+        # Partial index: lets the speed backfill find unresolved points without
+        # scanning each aircraft's full history
+        Index('ix_flight_telemetry_speed_pending', 'icao24', 'timestamp',
+              postgresql_where=speed_kph.is_(None)),
+        # Same for points still waiting for their AGL altitude (paged newest first)
+        Index('ix_flight_telemetry_agl_pending', 'timestamp', 'icao24',
+              postgresql_where=baro_altitude.isnot(None) & altitude_agl_ft.is_(None)),
+    )
     
+class AircraftState(Base):
+    """
+    Last known state per aircraft, maintained by the labeling stage so lookups
+    don't have to scan flight_telemetry history.
+    """
+    __tablename__ = 'aircraft_state'
+    icao24 = Column(String(6), ForeignKey('tracked_aircraft.icao24'), primary_key=True)
+
+    # From the latest point with a latest_airfield (timestamp in state_timestamp)
+    latest_airfield = Column(String(4))
+    latest_waterfield = Column(String(4))
+    is_full = Column(Boolean)
+    state_timestamp = Column(Integer)
+
+    # From the latest processed point
+    last_lat = Column(Float)
+    last_lon = Column(Float)
+    last_seen = Column(Integer)
+
 class RegionOfInterest(Base):
     __tablename__ = "regions_of_interest"
     
@@ -119,6 +168,15 @@ class WaterLocation(Base):
     lat = Column(Float)
     lon = Column(Float)
 
+class GeocodeCache(Base):
+    """ Reverse-geocoding API results per geohash cell, with TTL and LRU eviction. """
+    __tablename__ = 'geocode_cache'
+
+    cell       = Column(String(12), primary_key=True)   # geohash
+    location   = Column(String(100), nullable=False)
+    fetched_at = Column(Integer, nullable=False)        # unix timestamp
+    last_used  = Column(Integer, nullable=False, index=True)
+
 class FirmsFireIncident(Base):
     __tablename__ = 'firms_fire_incident'
 
@@ -160,7 +218,12 @@ class FirmsHotspot(Base):
 def run_migration():
     try:
         # Create all tables defined in Base
+        engine = get_engine()
         Base.metadata.create_all(engine)
+        # create_all skips indexes on tables that already exist
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(engine, checkfirst=True)
         logger.info("Database migration completed successfully.")
     except Exception as e:
         logger.error(f"Migration failed: {e}")
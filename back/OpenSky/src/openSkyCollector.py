@@ -1,18 +1,213 @@
 import re
+import json
 import requests
 import os
 from datetime import datetime
 import time
+import fcntl
+import threading
+from contextlib import contextmanager
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from httpSession import get_session
 logger = logging.getLogger(__name__)
 
+# OpenSky track requests: sustained rate (req/s) and burst shared by all threads
+OPENSKY_TRACK_RATE = float(os.getenv("OPENSKY_TRACK_RATE", 2.0))
+OPENSKY_TRACK_BURST = int(os.getenv("OPENSKY_TRACK_BURST", 4))
+OPENSKY_TRACK_WORKERS = int(os.getenv("OPENSKY_TRACK_WORKERS", 8))
+OPENSKY_MAX_BACKOFF = float(os.getenv("OPENSKY_MAX_BACKOFF", 60))
+
+# FR24 request budget: at most FR24_BUDGET_REQUESTS calls per rolling FR24_BUDGET_WINDOW seconds
+FR24_BUDGET_REQUESTS = int(os.getenv("FR24_BUDGET_REQUESTS", 10))
+FR24_BUDGET_WINDOW = float(os.getenv("FR24_BUDGET_WINDOW", 60))
+FR24_BUDGET_FILE = "fr24_budget.json"
+
 # FR24 only accepts standard civil registrations: must start with a letter,
 # contain only letters, digits, and hyphens (no dots, no all-numeric).
 _FR24_REG_RE = re.compile(r'^[A-Za-z][A-Za-z0-9-]+$')
 
 
+class RateLimiter:
+    """
+    Thread-safe token bucket: `rate` requests per second on average, up to
+    `burst` at once. pause() blocks every caller for a while, e.g. after a 429.
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, max_wait=None):
+        """Take one token, sleeping as needed. Returns False if that would mean waiting more than max_wait s."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                wait = self._blocked_until - now
+                if wait <= 0:
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return True
+                    wait = (1 - self._tokens) / self.rate
+            if max_wait is not None and wait > max_wait:
+                return False
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+
+class FR24Budget:
+    """
+    Rolling-window request budget for the FR24 API. The timestamps of recent
+    calls (and any 429 block) are persisted to a JSON file, so a run started
+    right after another one — or running alongside it — sees the real
+    remaining budget. Every check and update re-reads the file under an
+    exclusive flock on <path>.lock and merges it before saving, so concurrent
+    processes never overwrite each other's calls. acquire() returns as soon
+    as a call fits in the window — no fixed sleeps.
+
+    In dry-run mode nothing waits; acquire() only records the planned call.
+    """
+
+    def __init__(self, limit=FR24_BUDGET_REQUESTS, window=FR24_BUDGET_WINDOW, path=FR24_BUDGET_FILE, dry_run=False):
+        self.limit = limit
+        self.window = window
+        self.path = path
+        self.dry_run = dry_run
+        self.planned = []
+        self.calls = []
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+        self._load()
+
+    @contextmanager
+    def _shared_state(self):
+        """Hold the budget (thread lock + file lock) with the on-disk state merged in."""
+        with self._lock:
+            if not self.path or self.dry_run:
+                yield
+                return
+            with open(f"{self.path}.lock", 'a') as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                try:
+                    self._load()
+                    yield
+                finally:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _load(self):
+        """Merge the persisted state into ours (union of calls, latest block)."""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                state = json.load(f)
+            self.calls = sorted(set(self.calls) | set(state.get('calls', [])))
+            self.blocked_until = max(self.blocked_until, state.get('blocked_until', 0.0))
+        except Exception as e:
+            logger.warning(f"Could not read FR24 budget file: {e}")
+
+    def _save(self):
+        if not self.path or self.dry_run:
+            return
+        try:
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, 'w') as f:
+                json.dump({'calls': self.calls, 'blocked_until': self.blocked_until}, f)
+            os.replace(tmp, self.path)
+        except Exception as e:
+            logger.warning(f"Could not write FR24 budget file: {e}")
+
+    def _recent(self, now):
+        """Calls inside the window. Older ones are dropped, except the last `limit`: a
+        later run with a longer window must still see them."""
+        recent = [t for t in self.calls if t > now - self.window]
+        self.calls = self.calls[-max(len(recent), self.limit):]
+        return recent
+
+    def _available(self):
+        now = time.time()
+        recent = self._recent(now)
+        if now < self.blocked_until:
+            return 0
+        return max(self.limit - len(recent), 0)
+
+    def _wait_time(self):
+        now = time.time()
+        recent = self._recent(now)
+        wait = self.blocked_until - now
+        if len(recent) >= self.limit:
+            wait = max(wait, recent[len(recent) - self.limit] + self.window - now)
+        return max(wait, 0.0)
+
+    def available(self):
+        """Calls that could be made right now."""
+        with self._shared_state():
+            return self._available()
+
+    def wait_time(self):
+        """Seconds until the next call fits in the budget."""
+        with self._shared_state():
+            return self._wait_time()
+
+    def acquire(self, label=""):
+        """Block until a call fits in the budget, then count it."""
+        if self.dry_run:
+            with self._lock:
+                self.planned.append(label)
+            return
+        while True:
+            # The slot is re-checked after sleeping: another process may have taken it meanwhile
+            with self._shared_state():
+                wait = self._wait_time()
+                if wait <= 0:
+                    self.calls.append(time.time())
+                    self._save()
+                    return
+            logger.debug(f"FR24 budget: waiting {wait:.1f}s for {label or 'next call'}")
+            time.sleep(wait)
+
+    def penalize(self, seconds):
+        """After a 429: no calls until `seconds` from now."""
+        with self._shared_state():
+            self.blocked_until = max(self.blocked_until, time.time() + seconds)
+            self._save()
+
+
+OPENSKY_AUTH_URL = "https://auth.opensky-network.org/auth/realms/opensky-network/protocol/openid-connect/token"
+
+def fetch_opensky_token(client_id, client_secret, session=None):
+    """ OAuth2 client-credentials token, as OAuth2ClientCredential.sh gets it. Returns (token, expires_in_s). """
+    response = (session or get_session()).post(OPENSKY_AUTH_URL, data={
+        'grant_type': 'client_credentials',
+        'client_id': client_id,
+        'client_secret': client_secret,
+    }, timeout=15)
+    response.raise_for_status()
+    body = response.json()
+    return body['access_token'], int(body.get('expires_in', 1800))
+
+def _retry_after(response, default=10):
+    """Seconds to wait from a 429 response (OpenSky's own header, then the standard one)."""
+    for header in ('X-Rate-Limit-Retry-After-Seconds', 'Retry-After'):
+        try:
+            return float(response.headers[header])
+        except (KeyError, TypeError, ValueError):
+            continue
+    return default
+
+
 class FirefleetCollector:
-    def __init__(self, token):
+    def __init__(self, token, rate_limiter=None, session=None):
         self.url = "https://opensky-network.org/api/states/all"
         self.track_url = "https://opensky-network.org/api/tracks/all"
 
@@ -28,6 +223,8 @@ class FirefleetCollector:
         self.default_bbox['lomax'] = 19
 
         self.token = token
+        self.rate_limiter = rate_limiter or RateLimiter(OPENSKY_TRACK_RATE, OPENSKY_TRACK_BURST)
+        self.session = session or get_session()
 
     def get_positions(self, icao_list):
         # Construct the query parameters
@@ -49,7 +246,7 @@ class FirefleetCollector:
         
         try:
             logger.info( "Calling OpenSky API/states")
-            response = requests.get(
+            response = self.session.get(
                 self.url, 
                 headers=headers, # Switched from auth= to headers=
                 params=params, 
@@ -86,7 +283,7 @@ class FirefleetCollector:
         
         try:
             logger.info( "Calling OpenSky API/states")
-            response = requests.get(
+            response = self.session.get(
                 self.url, 
                 headers=headers, 
                 params=params, 
@@ -128,7 +325,7 @@ class FirefleetCollector:
             try:
                 # We fetch all (or use a bounding box for FinOps efficiency)
                 logger.info( "Calling OpenSky API/states")
-                response = requests.get(
+                response = self.session.get(
                     self.url, 
                     headers=headers, 
                     timeout=15
@@ -158,10 +355,13 @@ class FirefleetCollector:
                 logger.error(f"{e}")
                 return []
             
-    def get_aircraft_track(self, icao24, target_time=0):
+    def get_aircraft_track(self, icao24, target_time=0, max_retries=3):
         """
         Fetches the track for a specific aircraft at a specific time.
         target_time: Python datetime object or UNIX timestamp
+
+        Calls go through the shared rate limiter; a 429 pauses it for the
+        advertised retry delay (up to OPENSKY_MAX_BACKOFF) and retries.
         """
         params = {
             'icao24': icao24.lower(),
@@ -173,27 +373,48 @@ class FirefleetCollector:
             "Accept": self.app_json
         }
 
-        try:
-            logger.info( "Calling OpenSky API/track")
-            response = requests.get(
-                self.track_url, 
-                headers=headers, 
-                params=params, 
-                timeout=15
-                )
-            response.raise_for_status()
+        for attempt in range(max_retries + 1):
+            if not self.rate_limiter.acquire(max_wait=OPENSKY_MAX_BACKOFF):
+                logger.error(f"Too many requests, Quota exceeded: skipping track for {icao24}")
+                return None
+            try:
+                logger.info( "Calling OpenSky API/track")
+                response = self.session.get(
+                    self.track_url, 
+                    headers=headers, 
+                    params=params, 
+                    timeout=15
+                    )
+                response.raise_for_status()
 
-            return response.json() # Returns a full track object with path points
-        except requests.exceptions.HTTPError as e:
-            if e.response.status_code == 429:
-                logger.error(f"Too many requests, Quota exceeded: {e}")
-            elif e.response.status_code != 404:
-                logger.error(f"HTTP Error fetching track for {icao24}: {e}")
-            return None
-        except Exception as e:
-            # Catch non-HTTP errors like timeouts or connection issues
-            logger.error(f"Unexpected error fetching track for {icao24}: {e}")
-            return None
+                return response.json() # Returns a full track object with path points
+            except requests.exceptions.HTTPError as e:
+                if e.response.status_code == 429 and attempt < max_retries:
+                    retry_after = _retry_after(e.response)
+                    logger.warning(f"OpenSky 429 on track {icao24}, backing off {retry_after:.0f}s...")
+                    self.rate_limiter.pause(retry_after)
+                    continue
+                if e.response.status_code == 429:
+                    logger.error(f"Too many requests, Quota exceeded: {e}")
+                elif e.response.status_code != 404:
+                    logger.error(f"HTTP Error fetching track for {icao24}: {e}")
+                return None
+            except Exception as e:
+                # Catch non-HTTP errors like timeouts or connection issues
+                logger.error(f"Unexpected error fetching track for {icao24}: {e}")
+                return None
+
+    def get_aircraft_tracks(self, icao_list, max_workers=OPENSKY_TRACK_WORKERS):
+        """
+        Fetches current tracks for many aircraft concurrently, paced by the
+        shared rate limiter. Returns {icao24: track} for the successful calls.
+        """
+        icao_list = list(icao_list)
+        if not icao_list:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(icao_list))) as pool:
+            tracks = dict(zip(icao_list, pool.map(self.get_aircraft_track, icao_list)))
+        return {icao: track for icao, track in tracks.items() if track}
 
 class AdsbV2Collector:
     """Generic collector for any ADSBexchange v2 compatible API."""
@@ -205,14 +426,42 @@ class AdsbV2Collector:
         'adsboneapi':   'https://api.adsb.one/v2',
     }
 
-    def __init__(self, source='adsbfi'):
+    def __init__(self, source='adsbfi', session=None):
         if source not in self.SOURCES:
             raise ValueError(f"Unknown source '{source}'. Choose from: {list(self.SOURCES)}")
         self.source = source
         self.base_url = self.SOURCES[source]
+        self.session = session or get_session()
 
     ICAO_BATCH_SIZE = 50
 
+    def _batch_url(self, batch):
+        if self.source == 'adsbfi':
+            return f"https://opendata.adsb.fi/api/v2/icao/{','.join(batch)}"
+        return f"{self.base_url}/icao/{','.join(batch)}"
+
+    def _parse_aircraft(self, aircraft, clean_icao, results):
+        """Add the tracked aircraft of one API response to results (keyed by icao24)."""
+        for ac in aircraft:
+            icao24 = str(ac.get('hex', '')).lower().strip()
+            if icao24 not in clean_icao:
+                continue
+            lat, lon = ac.get('lat'), ac.get('lon')
+            if lat is None or lon is None:
+                continue
+            baro_alt = ac.get('alt_baro')
+            results[icao24] = {
+                'icao24':     icao24,
+                'timestamp':  int(time.time()) - int(ac.get('seen', 0) or 0),
+                'lat':        lat,
+                'lon':        lon,
+                'baro_alt':   baro_alt if baro_alt != 'ground' else None,
+                'on_ground':  baro_alt == 'ground',
+                'true_track': ac.get('track'),
+                'velocity':   ac.get('gs'),
+                'source':     self.source,
+            }
+
     def get_by_icao24(self, icao_list):
         clean_icao = {icao.lower() for icao in icao_list}
         icao_batch_list = list(clean_icao)
@@ -220,36 +469,13 @@ class AdsbV2Collector:
 
         for i in range(0, len(icao_batch_list), self.ICAO_BATCH_SIZE):
             batch = icao_batch_list[i:i + self.ICAO_BATCH_SIZE]
-            if self.source == 'adsbfi':
-                url = f"https://opendata.adsb.fi/api/v2/icao/{','.join(batch)}"
-            else:
-                url = f"{self.base_url}/icao/{','.join(batch)}"
+            url = self._batch_url(batch)
 
             try:
                 logger.info(f"Calling {self.source} API")
-                response = requests.get(url, timeout=15)
+                response = self.session.get(url, timeout=15)
                 response.raise_for_status()
-                aircraft = response.json().get('ac', [])
-
-                for ac in aircraft:
-                    icao24 = str(ac.get('hex', '')).lower().strip()
-                    if icao24 not in clean_icao:
-                        continue
-                    lat, lon = ac.get('lat'), ac.get('lon')
-                    if lat is None or lon is None:
-                        continue
-                    baro_alt = ac.get('alt_baro')
-                    results[icao24] = {
-                        'icao24':     icao24,
-                        'timestamp':  int(time.time()) - int(ac.get('seen', 0) or 0),
-                        'lat':        lat,
-                        'lon':        lon,
-                        'baro_alt':   baro_alt if baro_alt != 'ground' else None,
-                        'on_ground':  baro_alt == 'ground',
-                        'true_track': ac.get('track'),
-                        'velocity':   ac.get('gs'),
-                        'source':     self.source,
-                    }
+                self._parse_aircraft(response.json().get('ac', []), clean_icao, results)
 
             except Exception as e:
                 logger.error(f"{self.source} error: {e}")
@@ -268,7 +494,7 @@ class AdsbV2Collector:
     
         blacklist_set = {icao.lower() for icao in (blacklist or [])}
         try:
-            response = requests.get(url, timeout=15)
+            response = self.session.get(url, timeout=15)
             response.raise_for_status()
             aircraft = response.json().get('ac', [])
 
@@ -313,7 +539,9 @@ class AdsbV2Collector:
             return []
 
 class FR24Collector:
-    def __init__(self):
+    def __init__(self, session=None, budget=None):
+        self.session  = session or get_session()
+        self.budget   = budget or FR24Budget()
         self.api_key  = os.getenv('FR24_API_KEY')
         self.base_url = 'https://fr24api.flightradar24.com/api'
         self.headers  = {
@@ -322,6 +550,18 @@ class FR24Collector:
             'Authorization':  f'Bearer {self.api_key}'
         }
 
+    def _get(self, url, params, label="", retries=1):
+        """GET within the request budget; a 429 blocks the budget for Retry-After and retries."""
+        for attempt in range(retries + 1):
+            self.budget.acquire(label)
+            response = self.session.get(url, headers=self.headers, params=params, timeout=15)
+            if response.status_code == 429 and attempt < retries:
+                retry_after = _retry_after(response, default=60)
+                logger.warning(f"FR24 429 on {label or url}, budget blocked for {retry_after:.0f}s...")
+                self.budget.penalize(retry_after)
+                continue
+            return response
+
     def get_by_registrations(self, reg_to_icao, bounds=None):
         """
         Fetch live positions filtered by aircraft registration.
@@ -340,8 +580,6 @@ class FR24Collector:
         results = {}
 
         for i in range(0, len(registrations), 20):
-            if i > 0:
-                time.sleep(7)
             batch = registrations[i:i + 20]
             batch_num = i // 20 + 1
             params = {'registrations': ','.join(batch)}
@@ -349,7 +587,7 @@ class FR24Collector:
                 params['bounds'] = bounds
             try:
                 logger.info(f"Calling FR24 API/positions (batch {batch_num})")
-                response = requests.get(url, headers=self.headers, params=params, timeout=15)
+                response = self._get(url, params, f"positions batch {batch_num}")
                 response.raise_for_status()
                 self._parse_positions(response.json().get('data', []), icao_lower, results)
             except requests.exceptions.HTTPError as e:
@@ -359,19 +597,17 @@ class FR24Collector:
                     logger.warning(f"FR24 batch {batch_num} rejected (400), retrying individually...")
                     for reg in batch:
                         try:
-                            r = requests.get(url, headers=self.headers,
-                                             params={'registrations': reg}, timeout=15)
+                            r = self._get(url, {'registrations': reg}, f"positions {reg}")
                             r.raise_for_status()
                             self._parse_positions(r.json().get('data', []), icao_lower, results)
                         except Exception as e2:
                             logger.info(f"FR24 skipped registration '{reg}': {e2}")
-                        time.sleep(0.5)
                 elif status in (429,) or (status is not None and status >= 500):
                     retry_after = int(e.response.headers.get('Retry-After', 60))
                     logger.warning(f"FR24 batch {batch_num} got {status}, retrying after {retry_after}s...")
-                    time.sleep(retry_after)
+                    self.budget.penalize(retry_after)
                     try:
-                        r = requests.get(url, headers=self.headers, params=params, timeout=15)
+                        r = self._get(url, params, f"positions batch {batch_num}")
                         r.raise_for_status()
                         self._parse_positions(r.json().get('data', []), icao_lower, results)
                     except Exception as e2:
@@ -413,39 +649,48 @@ class FR24Collector:
                 'source':     'fr24',
             }
 
-    def get_track(self, icao24, fr24_id=None):
-        """Fetch positional track for a specific FR24 flight ID."""
+    @staticmethod
+    def _parse_track(body, since_ts=None):
+        """
+        FR24 flight-tracks response → [[ts, lat, lon, alt_m, track, on_ground], ...].
+        With since_ts, points at or before it are dropped; UTC 'Z' timestamps are
+        compared as strings so older points are skipped before any parsing.
+        """
+        if isinstance(body, list):
+            tracks = body[0].get('tracks', []) if body else []
+        else:
+            tracks = body.get('tracks', [])
+
+        since_iso = datetime.utcfromtimestamp(since_ts).strftime('%Y-%m-%dT%H:%M:%S') if since_ts is not None else None
+        points = []
+        for p in tracks:
+            ts_str = p.get('timestamp')
+            if since_iso and isinstance(ts_str, str) and ts_str.endswith('Z') and ts_str[:19] <= since_iso:
+                continue
+            try:
+                ts = int(datetime.fromisoformat(ts_str.replace('Z', '+00:00')).timestamp())
+            except Exception:
+                continue
+            if since_ts is not None and ts <= since_ts:
+                continue
+            alt_ft = p.get('alt')
+            alt_m  = round(alt_ft / 3.28084, 1) if alt_ft is not None else None
+            points.append([ts, p.get('lat'), p.get('lon'), alt_m, p.get('track'), alt_ft == 0])
+        return points
+
+    def get_track(self, icao24, fr24_id=None, since_ts=None):
+        """Fetch positional track for a specific FR24 flight ID, only points after since_ts if given."""
         if not fr24_id:
             logger.warning(f"[{icao24}] No FR24 flight ID, cannot fetch track.")
             return []
 
         try:
             logger.info(f"Calling FR24 API/flight-tracks for {icao24} ({fr24_id})")
-            response = requests.get(
-                f"{self.base_url}/flight-tracks",
-                headers=self.headers,
-                params={'flight_id': fr24_id},
-                timeout=15
-            )
+            response = self._get(f"{self.base_url}/flight-tracks", {'flight_id': fr24_id}, f"track {fr24_id}")
             response.raise_for_status()
-            body = response.json()
-            if isinstance(body, list):
-                tracks = body[0].get('tracks', []) if body else []
-            else:
-                tracks = body.get('tracks', [])
-
-            points = []
-            for p in tracks:
-                ts_str = p.get('timestamp')
-                try:
-                    ts = int(datetime.fromisoformat(ts_str.replace('Z', '+00:00')).timestamp())
-                except Exception:
-                    continue
-                alt_ft = p.get('alt')
-                alt_m  = round(alt_ft / 3.28084, 1) if alt_ft is not None else None
-                points.append([ts, p.get('lat'), p.get('lon'), alt_m, p.get('track'), alt_ft == 0])
+            points = self._parse_track(response.json(), since_ts)
 
-            logger.info(f"FR24 track for {icao24}: {len(points)} points")
+            logger.info(f"FR24 track for {icao24}: {len(points)} {'new ' if since_ts is not None else ''}points")
             return points
 
         except Exception as e:
@@ -464,8 +709,6 @@ class FR24Collector:
         summaries = []
 
         for i in range(0, len(all_regs), 20):
-            if i > 0:
-                time.sleep(7)
             batch = all_regs[i:i + 20]
             batch_num = i // 20 + 1
             params = {
@@ -475,7 +718,7 @@ class FR24Collector:
             }
             try:
                 logger.info(f"Calling FR24 API/flight-summary (batch {batch_num}, {dt_from} → {dt_to})")
-                response = requests.get(url, headers=self.headers, params=params, timeout=15)
+                response = self._get(url, params, f"flight-summary batch {batch_num}")
                 response.raise_for_status()
                 for entry in response.json().get('data', []):
                     icao24 = str(entry.get('hex', '') or '').lower().strip()
@@ -491,8 +734,7 @@ class FR24Collector:
                     logger.warning(f"FR24 flight-summary batch {batch_num} rejected (400), retrying individually...")
                     for reg in batch:
                         try:
-                            r = requests.get(url, headers=self.headers,
-                                             params={**params, 'registrations': reg}, timeout=15)
+                            r = self._get(url, {**params, 'registrations': reg}, f"flight-summary {reg}", retries=0)
                             r.raise_for_status()
                             for entry in r.json().get('data', []):
                                 icao24 = str(entry.get('hex', '') or '').lower().strip()
@@ -507,10 +749,9 @@ class FR24Collector:
                             if status2 == 429:
                                 retry_after = int(e2.response.headers.get('Retry-After', 60))
                                 logger.warning(f"FR24 flight-summary 429 on '{reg}', retrying after {retry_after}s...")
-                                time.sleep(retry_after)
+                                self.budget.penalize(retry_after)
                                 try:
-                                    r = requests.get(url, headers=self.headers,
-                                                     params={**params, 'registrations': reg}, timeout=15)
+                                    r = self._get(url, {**params, 'registrations': reg}, f"flight-summary {reg}", retries=0)
                                     r.raise_for_status()
                                     for entry in r.json().get('data', []):
                                         icao24 = str(entry.get('hex', '') or '').lower().strip()
@@ -526,7 +767,6 @@ class FR24Collector:
                                 logger.info(f"FR24 flight-summary skipped '{reg}': {e2}")
                         except Exception as e2:
                             logger.info(f"FR24 flight-summary skipped '{reg}': {e2}")
-                        time.sleep(6)
                 else:
                     logger.error(f"FR24 flight-summary batch {batch_num}: {e}")
             except Exception as e:
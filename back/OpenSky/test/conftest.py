@@ -13,8 +13,11 @@ sys.modules['rasterio']            = MagicMock()
 sys.modules['rasterio.windows']    = MagicMock()
 sys.modules['sklearn']             = MagicMock()
 sys.modules['sklearn.cluster']     = MagicMock()
-sys.modules['scipy']               = MagicMock()
-sys.modules['scipy.spatial']       = MagicMock()
-sys.modules['shapely']             = MagicMock()
-sys.modules['shapely.geometry']    = MagicMock()
-sys.modules['shapely.ops']         = MagicMock()
\ No newline at end of file
+
+# Geometry libraries are used for real when installed (spatial index tests),
+# mocked otherwise — tests that need them skip on the mocks
+for name in ('scipy', 'scipy.spatial', 'shapely', 'shapely.geometry', 'shapely.ops'):
+    try:
+        __import__(name)
+    except ImportError:
+        sys.modules[name] = MagicMock()
@@ -0,0 +1,102 @@
+from unittest.mock import MagicMock
+from aircraftDataHandler import get_latest_timestamps, LATEST_TIMESTAMPS_SQL
+
+
+def test_get_latest_timestamps_single_query_for_fleet():
+    session = MagicMock()
+    session.execute.return_value.all.return_value = [('3b7b39', 1000)]
+
+    result = get_latest_timestamps(session, ['3B7B39', ' 3b7b63'])
+
+    session.execute.assert_called_once_with(LATEST_TIMESTAMPS_SQL, {"icao_list": ['3b7b39', '3b7b63']})
+    assert result == {'3b7b39': 1000}
+    assert result.get('3b7b63', -1) == -1
+
+
+def test_get_latest_timestamps_empty_fleet_no_query():
+    session = MagicMock()
+
+    assert get_latest_timestamps(session, []) == {}
+    session.execute.assert_not_called()
+
+
+def test_ingest_buffer_first_row_wins_and_single_statement():
+    from aircraftDataHandler import TelemetryIngestBuffer, INGEST_TELEMETRY_SQL
+
+    session = MagicMock()
+    session.execute.return_value.rowcount = 2
+    buffer = TelemetryIngestBuffer(session, flush_rows=100, flush_seconds=3600)
+
+    assert buffer.add('3b7b39', [[1000, 43.0, 4.0, 100.0, 90.0, False]]) == 1
+    assert buffer.add('3b7b39', [[1000, 0.0, 0.0, None, None, True]], source='fr24') == 0
+    assert buffer.add('3b7b63', [[1000, 44.0, 5.0, None, None, True]], source='adsb') == 1
+    session.execute.assert_not_called()
+
+    assert buffer.flush() == 2
+    stmt, params = session.execute.call_args[0]
+    assert stmt is INGEST_TELEMETRY_SQL
+    assert params["icao24"] == ['3b7b39', '3b7b63']
+    assert params["source"] == ['opensky', 'adsb']
+    assert params["baro_altitude_ft"] == [328, 0]
+    session.commit.assert_called_once()
+    assert len(buffer) == 0
+
+
+def test_ingest_buffer_flushes_at_row_threshold():
+    from aircraftDataHandler import TelemetryIngestBuffer
+
+    session = MagicMock()
+    buffer = TelemetryIngestBuffer(session, flush_rows=2, flush_seconds=3600)
+
+    buffer.add('3b7b39', [[1000, 43.0, 4.0, None, None, True]])
+    session.execute.assert_not_called()
+    buffer.add('3b7b39', [[2000, 43.0, 4.0, None, None, True]])
+    session.execute.assert_called_once()
+
+
+def test_copy_value_text_format():
+    from aircraftDataHandler import _copy_value
+
+    assert _copy_value(None) == '\\N'
+    assert _copy_value(True) == 't'
+    assert _copy_value(1234.5) == '1234.5'
+    assert _copy_value('a\tb\\c') == 'a\\tb\\\\c'
+
+
+def test_ingest_buffer_uses_copy_above_threshold():
+    from unittest.mock import patch
+    from aircraftDataHandler import TelemetryIngestBuffer
+
+    session = MagicMock()
+    buffer = TelemetryIngestBuffer(session, flush_rows=100, flush_seconds=3600, copy_rows=2)
+    buffer.add('3b7b39', [[1000, 43.0, 4.0, None, None, True], [2000, 43.0, 4.0, None, None, True]])
+
+    with patch('aircraftDataHandler.copy_insert_telemetry', return_value=2) as copy:
+        assert buffer.flush() == 2
+
+    copy.assert_called_once()
+    assert copy.call_args[0][1]["timestamp"] == [1000, 2000]
+    session.commit.assert_called_once()
+
+
+def test_ingest_buffer_failed_flush_contained_per_batch_and_kept():
+    from aircraftDataHandler import TelemetryIngestBuffer
+
+    def execute(stmt, params):
+        if len(set(params["icao24"])) > 1 or params["icao24"][0] == 'bad000':
+            raise ValueError("bad row")
+        return MagicMock(rowcount=len(params["icao24"]))
+
+    session = MagicMock()
+    session.execute.side_effect = execute
+    buffer = TelemetryIngestBuffer(session, flush_rows=100, flush_seconds=3600)
+    buffer.add('3b7b39', [[1000, 43.0, 4.0, None, None, True]])
+    buffer.add('bad000', [[1000, 43.0, 4.0, None, None, True]], source='fr24')
+
+    assert buffer.flush() == 1
+    assert buffer.failed == {'bad000'}
+    assert len(buffer) == 1                      # kept for the next flush
+
+    session.execute.side_effect = lambda stmt, params: MagicMock(rowcount=len(params["icao24"]))
+    assert buffer.flush() == 1
+    assert buffer.failed == set() and len(buffer) == 0
@@ -0,0 +1,29 @@
+import asyncio
+import httpx
+from asyncCollectors import AsyncAdsbV2Collector
+
+
+def test_async_adsb_runs_batches_concurrently_and_parses():
+    in_flight = max_in_flight = 0
+
+    async def handler(request):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        hexes = request.url.path.rsplit('/', 1)[-1].split(',')
+        return httpx.Response(200, json={'ac': [{'hex': h, 'lat': 43.0, 'lon': 4.0, 'alt_baro': 'ground'} for h in hexes]})
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            collector = AsyncAdsbV2Collector('adsbonelol', client, concurrency=3)
+            return await collector.get_by_icao24([f"ab{i:04x}" for i in range(200)])
+
+    results = asyncio.run(run())
+
+    assert len(results) == 200
+    assert results['ab0000']['on_ground'] is True
+    assert results['ab0000']['source'] == 'adsbonelol'
+    assert max_in_flight == 3   # 4 batches of 50, limited to 3 at once
+
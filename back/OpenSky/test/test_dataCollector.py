@@ -1,6 +1,7 @@
 import pytest
 import json
 import os
+import time
 from unittest.mock import patch, mock_open, MagicMock
 
 # Assuming the function is in dataCollector.py
@@ -39,4 +40,116 @@ def test_returns_empty_list_when_cache_is_empty():
     with patch('os.path.exists', return_value=True), \
          patch('builtins.open', mock_open(read_data='[]')):
         result = get_cached_icao_list()
-    assert result == []
\ No newline at end of file
+    assert result == []
+
+def _point(ts, baro_alt=None, source='adsbfi'):
+    return {'icao24': '3b7b39', 'timestamp': ts, 'lat': 43.0, 'lon': 4.0,
+            'baro_alt': baro_alt, 'on_ground': False, 'true_track': None, 'source': source}
+
+
+def test_adsb_log_append_take_and_rotate(tmp_path):
+    from dataCollector import _append_adsb_points, _take_adsb_cache
+
+    path = str(tmp_path / 'adsb.jsonl')
+    _append_adsb_points([_point(1000)], path)
+    _append_adsb_points([_point(1000, baro_alt=500, source='adsbonelol'), _point(2000)], path)
+    with open(path, 'a') as f:
+        f.write('{"icao24": "3b7b39", "timest')   # interrupted write
+
+    cache, merging = _take_adsb_cache(path)
+
+    assert set(cache['3b7b39']) == {'1000', '2000'}
+    assert cache['3b7b39']['1000']['source'] == 'adsbonelol'   # richer point wins
+    assert not os.path.exists(path)
+
+    # Points appended during the merge go to a fresh log, not the one being merged
+    _append_adsb_points([_point(3000)], path)
+    os.remove(merging)
+    cache, _ = _take_adsb_cache(path)
+    assert set(cache['3b7b39']) == {'3000'}
+
+
+def test_adsb_log_leftover_merge_file_is_not_lost(tmp_path):
+    from dataCollector import _append_adsb_points, _take_adsb_cache
+
+    path = str(tmp_path / 'adsb.jsonl')
+    _append_adsb_points([_point(1000)], path)
+    _take_adsb_cache(path)          # sync interrupted before deleting .merging
+    _append_adsb_points([_point(2000)], path)
+
+    cache, _ = _take_adsb_cache(path)
+
+    assert set(cache['3b7b39']) == {'1000', '2000'}
+
+
+def test_fr24_checkpoints_advance_only_for_ingested_aircraft(tmp_path):
+    from dataCollector import advance_fr24_checkpoints
+    from fr24Cache import FR24TrackCache
+
+    cache = FR24TrackCache(str(tmp_path / 'fr24_cache'))
+    cache.begin()
+    cache.append_leg('3b7b39', 'leg-a', [[1000, 43.5, 4.5, 500.0, 90, False]])
+    cache.append_leg('3b7b40', 'leg-b', [[2000, 44.0, 5.0, 500.0, 90, False]])
+    cache.commit()
+    checkpoints = {'leg-b': {'last_ts': 1500, 'advanced_at': 0}}
+
+    assert advance_fr24_checkpoints(cache, checkpoints, ['3b7b39']) == 1
+    assert checkpoints['leg-a']['last_ts'] == 1000
+    assert checkpoints['leg-b'] == {'last_ts': 1500, 'advanced_at': 0}
+
+
+def test_backfilled_fr24_leg_is_forwarded_once(tmp_path, monkeypatch):
+    import dataCollector
+    from fr24Cache import FR24TrackCache
+
+    monkeypatch.chdir(tmp_path)   # cache, checkpoint and ADSB files are relative paths
+    days_ago = int(time.time()) - 5 * 86400
+    cache = FR24TrackCache(dataCollector.FR24_CACHE_DIR)
+    cache.begin()
+    cache.append_leg('3b7b39', 'leg-a', [[days_ago + i, 43.5, 4.5, 500.0, 90, False] for i in range(3)], ended=True)
+    cache.commit()
+
+    forwarded = []
+
+    class Ingest:
+        def __init__(self, session):
+            self.newest, self.failed, self.inserted = {}, set(), 0
+
+        def add(self, icao24, path_data, source='opensky', is_processed=False):
+            forwarded.extend(path_data)
+
+        def flush(self):
+            return 0
+
+    collector = MagicMock()
+    collector.get_by_icao24.return_value = []
+    collector.get_aircraft_tracks.return_value = {}
+    with patch.object(dataCollector, 'SessionLocal'), \
+         patch.object(dataCollector, 'FirefleetCollector', return_value=collector), \
+         patch.object(dataCollector, 'TelemetryIngestBuffer', Ingest):
+        dataCollector.orchestrate_sync(['3b7b39'], {})
+        assert len(forwarded) == 3
+        dataCollector.orchestrate_sync(['3b7b39'], {})
+
+    assert len(forwarded) == 3
+
+
+def test_legacy_fr24_json_cache_is_converted_once(tmp_path, monkeypatch):
+    import dataCollector
+    from fr24Cache import FR24TrackCache, records_to_points
+
+    monkeypatch.chdir(tmp_path)
+    track = [[1000, 43.5, 4.5, 500.0, 90.0, False], [1010, 43.6, 4.6, 520.0, 91.0, False]]
+    with open(dataCollector.FR24_LEGACY_CACHE, 'w') as f:
+        json.dump({'3b7b39': {'icao24': '3b7b39', 'source': 'fr24', 'fr24_id': 'leg-a', 'track': track}}, f)
+
+    dataCollector._convert_legacy_fr24_cache()
+
+    cache = FR24TrackCache(dataCollector.FR24_CACHE_DIR)
+    leg = cache.legs('3b7b39')[0]
+    assert leg['fr24_id'] == 'leg-a' and leg['last_ts'] == 1010 and not leg['ended'] and not leg['on_ground']
+    assert records_to_points(cache.track('3b7b39')) == track
+    assert not os.path.exists(dataCollector.FR24_LEGACY_CACHE)
+
+    dataCollector._convert_legacy_fr24_cache()   # nothing left to convert
+    assert FR24TrackCache(dataCollector.FR24_CACHE_DIR).fr24_ids() == ['leg-a']
@@ -1,3 +1,6 @@
+import os
+import sys
+import subprocess
 import pytest
 import math
 from unittest.mock import MagicMock, patch
@@ -223,4 +226,392 @@ def test_exactly_at_radius_boundary():
 
     result = proximity_check(point, [af], radius_km=actual_dist, alt_threshold_ft=1500)
 
-    assert result == af
\ No newline at end of file
+    assert result == af
+
+def test_backfill_telemetry_skips_when_no_aircraft(mock_db):
+    from dataProcessor import backfill_telemetry
+
+    backfill_telemetry(None)
+
+    mock_db.execute.assert_not_called()
+
+
+def test_backfill_telemetry_single_set_based_update(mock_db):
+    from dataProcessor import backfill_telemetry, BACKFILL_SPEED_SQL
+
+    backfill_telemetry(['3b7b39', '3b7b63'])
+
+    mock_db.execute.assert_called_once_with(BACKFILL_SPEED_SQL, {"icao_list": ['3b7b39', '3b7b63']})
+    mock_db.commit.assert_called_once()
+    # Only unresolved rows, each joined to its single predecessor
+    sql = str(BACKFILL_SPEED_SQL)
+    assert "speed_kph IS NULL" in sql
+    assert "LIMIT 1" in sql
+
+
+def test_compute_agl_ft_clamps_and_uses_sentinel():
+    import numpy as np
+    from dataProcessor import compute_agl_ft, AGL_SENTINEL_FT
+
+    result = compute_agl_ft([1000.0, 100.0, 500.0], np.array([400.0, 200.0, np.nan]))
+
+    assert result[0] == pytest.approx(round(600.0 * 3.28084))
+    assert result[1] == 0
+    assert result[2] == AGL_SENTINEL_FT
+
+
+def test_http_elevation_client_uses_binary_batch():
+    import numpy as np
+    import dataProcessor
+
+    resp = MagicMock()
+    resp.content = np.array([120.5, np.nan], dtype='<f4').tobytes()
+
+    session = MagicMock()
+    session.post.return_value = resp
+    post = session.post
+    with patch('dataProcessor.get_session', return_value=session), \
+         patch('dataProcessor.ELEVATION_BACKEND', 'http'):
+        ground = dataProcessor.fetch_ground_elevations([43.5, 10.0], [4.5, 10.0])
+
+    url = post.call_args[0][0]
+    sent = np.frombuffer(post.call_args[1]['data'], dtype='<f8').reshape(-1, 2)
+    assert url.endswith('/elevation/batch/bin')
+    assert sent.tolist() == [[43.5, 4.5], [10.0, 10.0]]
+    assert ground[0] == pytest.approx(120.5)
+    assert np.isnan(ground[1])
+
+
+def test_http_elevation_client_failed_batch_is_nan():
+    import numpy as np
+    import dataProcessor
+
+    session = MagicMock()
+    session.post.side_effect = Exception('down')
+    with patch('dataProcessor.get_session', return_value=session), \
+         patch('dataProcessor.ELEVATION_BACKEND', 'http'):
+        ground = dataProcessor.fetch_ground_elevations([43.5], [4.5])
+
+    assert np.isnan(ground).all()
+
+
+def test_bulk_update_telemetry_single_statement_with_arrays():
+    import numpy as np
+    from dataProcessor import bulk_update_telemetry
+
+    session = MagicMock()
+    bulk_update_telemetry(session, ['3b7b39', '3b7b63'], [1000, 2000],
+                          altitude_agl_ft=np.array([350.0, np.nan]))
+
+    session.execute.assert_called_once()
+    stmt, params = session.execute.call_args[0]
+    assert "unnest" in str(stmt)
+    assert params == {
+        "icao24": ['3b7b39', '3b7b63'],
+        "timestamp": [1000, 2000],
+        "altitude_agl_ft": [350.0, None],
+    }
+
+
+def test_bulk_update_telemetry_noop_when_empty():
+    from dataProcessor import bulk_update_telemetry
+
+    session = MagicMock()
+    bulk_update_telemetry(session, [], [], altitude_agl_ft=[])
+
+    session.execute.assert_not_called()
+
+
+def make_columns(rows):
+    import numpy as np
+    icao24, timestamp, agl, on_ground = zip(*rows)
+    return {
+        "icao24": np.array(icao24, dtype=object),
+        "timestamp": np.array(timestamp),
+        "lat": np.zeros(len(rows)),
+        "lon": np.zeros(len(rows)),
+        "on_ground": np.array(on_ground),
+        "baro_altitude_ft": np.array(agl, dtype=float) + 1000.0,
+        "altitude_agl_ft": np.array(agl, dtype=float),
+    }
+
+
+def test_label_points_inherits_airfield_per_aircraft_in_time_order():
+    from dataProcessor import label_points
+
+    # Rows deliberately out of order; aircraft 'b' must not inherit 'a''s airfield
+    cols = make_columns([
+        ('a', 3000, 5000.0, False),
+        ('b', 1000, 5000.0, False),
+        ('a', 1000, 0.0, True),
+        ('a', 2000, 500.0, False),
+    ])
+    labels = label_points(cols, [None, None, 'LFMP', None], [None] * 4,
+                          airfield_dict={}, is_full_dict={}, waterfield_dict={},
+                          water_bombers={'a'}, helicopters=set())
+
+    assert labels["at_airfield"].tolist() == [False, False, True, False]
+    assert labels["latest_airfield"].tolist() == ['LFMP', None, 'LFMP', 'LFMP']
+    assert labels["is_low_pass"].tolist() == [False, False, False, True]
+    assert labels["is_full"].tolist() == [True, False, True, False]
+
+
+def test_label_points_waterfield_cleared_at_airfield_and_falls_back():
+    from dataProcessor import label_points
+
+    cols = make_columns([
+        ('a', 1000, 5000.0, False),
+        ('a', 2000, 50.0, False),
+        ('a', 3000, 0.0, True),
+        ('a', 4000, 5000.0, False),
+    ])
+    labels = label_points(cols, [None, None, 'LFMP', None], [None, 'W1', None, None],
+                          airfield_dict={}, is_full_dict={'a': False}, waterfield_dict={'a': 'W0'},
+                          water_bombers=set(), helicopters={'a'})
+
+    assert labels["latest_waterfield"].tolist() == ['W0', 'W1', None, 'W1']
+    assert labels["at_waterfield"].tolist() == [False, True, False, False]
+
+
+needs_scipy = pytest.mark.skipif(isinstance(sys.modules.get('scipy.spatial'), MagicMock), reason="scipy not installed")
+
+
+@needs_scipy
+def test_airfield_index_agrees_with_calculate_distance_at_radius():
+    import numpy as np
+    from types import SimpleNamespace
+    from dataProcessor import AirfieldIndex, label_points
+
+    airfield = SimpleNamespace(icao='LFMP', lat=43.5, lon=4.5)
+    index = AirfieldIndex([airfield])
+    radius_km = 3.0
+    deg_per_km = 1 / (calculate_distance(0, 0, 1, 0))
+    lats = np.array([43.5 + radius_km * f * deg_per_km for f in (0.999, 1.001, 0.5, 0.5)])
+    lons = np.full(4, 4.5)
+
+    inside = [calculate_distance(lat, 4.5, 43.5, 4.5) <= radius_km for lat in lats]
+    hits = index.query(lats, lons, radius_km)
+    assert inside == [True, False, True, True]
+    assert list(hits >= 0) == inside
+
+    # In radius: on the ground counts whatever the AGL, airborne only below the threshold
+    points = [make_point(lat=lats[i], lon=4.5, on_ground=g, altitude_agl_ft=agl)
+              for i, g, agl in ((0, False, 500.0), (1, False, 500.0), (2, True, 5000.0), (3, False, 5000.0))]
+    expected = [proximity_check(p, [airfield], radius_km, 900) is not None for p in points]
+    assert expected == [True, False, True, False]
+
+    cols = make_columns([('a', 1000 + i, p.altitude_agl_ft, p.on_ground) for i, p in enumerate(points)])
+    airfield_hit = np.array(['LFMP', None], dtype=object)[hits]
+    labels = label_points(cols, airfield_hit, [None] * 4, airfield_dict={}, is_full_dict={}, waterfield_dict={},
+                          water_bombers=set(), helicopters=set(), airfield_alt_threshold=900)
+    assert list(labels["at_airfield"]) == expected
+
+
+needs_shapely = pytest.mark.skipif(isinstance(sys.modules.get('shapely'), MagicMock), reason="shapely not installed")
+
+
+@needs_shapely
+def test_waterfield_index_first_roi_wins_boundary_and_misses():
+    from shapely.geometry import Polygon
+    from dataProcessor import WaterfieldIndex
+
+    # [lat, lon] space; the two ROIs overlap on 43.5–44.0
+    index = WaterfieldIndex([
+        Polygon([(43.0, 4.0), (44.0, 4.0), (44.0, 5.0), (43.0, 5.0)]),
+        Polygon([(43.5, 4.0), (45.0, 4.0), (45.0, 5.0), (43.5, 5.0)]),
+    ], ['W001', 'W002'])
+
+    hits = index.query([43.75, 44.5, 43.2, 43.0, 46.0], [4.5, 4.5, 4.5, 4.5, 4.5])
+
+    # overlap → first ROI, second-only, first-only, on the edge (not within), outside
+    assert list(hits) == [0, 1, 0, -1, -1]
+    assert list(WaterfieldIndex([], []).query([43.75], [4.5])) == [-1]
+
+
+def test_partition_by_load_balances_points_and_keeps_aircraft_whole():
+    from dataProcessor import partition_by_load
+
+    counts = {'a': 100, 'b': 60, 'c': 50, 'd': 10}
+    parts = partition_by_load(counts, 2)
+
+    assert sorted(sum(parts, [])) == ['a', 'b', 'c', 'd']
+    assert sorted(sum(counts[i] for i in p) for p in parts) == [110, 110]
+    assert partition_by_load({'a': 1}, 4) == [['a']]
+
+
+def test_aircraft_state_from_batch_takes_latest_airfield_and_position():
+    import numpy as np
+    from dataProcessor import aircraft_state_from_batch
+
+    cols = make_columns([
+        ('a', 2000, 0.0, True),
+        ('b', 1000, 5000.0, False),
+        ('a', 3000, 5000.0, False),
+        ('a', 1000, 0.0, True),
+    ])
+    cols["lat"] = np.array([1.0, 2.0, 3.0, 4.0])
+    labels = {
+        "latest_airfield": np.array(['LFMP', None, None, 'LFTH'], dtype=object),
+        "latest_waterfield": np.array([None, 'W1', None, None], dtype=object),
+        "is_full": np.array([True, False, False, True]),
+    }
+
+    rows = aircraft_state_from_batch(cols, labels)
+
+    assert rows["icao24"] == ['a', 'b']
+    assert rows["latest_airfield"] == ['LFMP', None]
+    assert rows["is_full"] == [True, None]
+    assert rows["state_timestamp"] == [2000, None]
+    assert rows["last_lat"] == [3.0, 2.0]
+    assert rows["last_seen"] == [3000, 1000]
+
+
+def test_sync_aircraft_metadata_single_update(mock_db):
+    import dataProcessor
+
+    mock_db.execute.return_value.rowcount = 3
+    with patch('dataProcessor.seed_aircraft_state'):
+        dataProcessor.sync_aircraft_metadata()
+
+    mock_db.execute.assert_called_once_with(dataProcessor.SYNC_AIRCRAFT_METADATA_SQL)
+    mock_db.query.assert_not_called()
+    mock_db.commit.assert_called_once()
+
+
+def test_backfill_aircraft_location_offline_first_api_for_misses(mock_db):
+    import numpy as np
+    import dataProcessor
+
+    mock_db.query.return_value.join.return_value.filter.return_value.all.return_value = [
+        ('3b7b39', 1000, 43.5, 4.5),
+        ('3b7b63', 2000, 10.0, 10.0),
+    ]
+    geocoder = MagicMock()
+    geocoder.lookup.return_value = np.array(['France', None], dtype=object)
+
+    with patch('dataProcessor._get_offline_geocoder', return_value=geocoder), \
+         patch('dataProcessor._reverse_geocode_location', return_value='Chad') as api, \
+         patch('dataProcessor.bulk_update_telemetry') as bulk, \
+         patch('dataProcessor.time.sleep') as sleep:
+        dataProcessor.backfill_aircraft_location()
+
+    api.assert_called_once_with(10.0, 10.0)
+    sleep.assert_not_called()
+    bulk.assert_called_once_with(mock_db, ['3b7b39', '3b7b63'], [1000, 2000], location=['France', 'Chad'])
+
+
+def test_cached_reference_reloads_only_when_fingerprint_changes(mock_db):
+    import dataProcessor
+    loader = MagicMock(side_effect=['v1', 'v2'])
+    fingerprints = iter([('a',), ('a',), ('b',)])
+    with patch.object(dataProcessor, '_reference_cache', {}), \
+         patch.object(dataProcessor, '_reference_fingerprint', side_effect=lambda s, src: next(fingerprints)):
+        values = [dataProcessor._cached_reference(mock_db, 'airfields', 'airfields', loader) for _ in range(3)]
+
+    assert values == ['v1', 'v1', 'v2']
+    assert loader.call_count == 2
+
+
+def test_daemon_cycle_runs_stages_in_order_and_keeps_fleet(mock_db):
+    import dataProcessor
+    calls = []
+    stage = lambda name, result=None: MagicMock(side_effect=lambda *a, **k: calls.append(name) or result)
+    with patch.object(dataProcessor, '_reference_cache', None), \
+         patch.object(dataProcessor, '_reference_fingerprint', return_value=('fleet',)), \
+         patch.object(dataProcessor, 'get_all_tracked_icao24', stage('fleet', ['3b7b39'])), \
+         patch.object(dataProcessor, 'get_latest_timestamps', return_value={'3b7b39': 1000}), \
+         patch.object(dataProcessor, 'update_adsb_cache', stage('adsb')), \
+         patch.object(dataProcessor, 'orchestrate_sync', stage('collect', ['3b7b39'])) as sync, \
+         patch.object(dataProcessor, 'backfill_telemetry', stage('backfill')), \
+         patch.object(dataProcessor, 'backfill_agl', stage('agl')), \
+         patch.object(dataProcessor, 'label_flight_phases', stage('label')), \
+         patch.object(dataProcessor, 'sync_aircraft_metadata', stage('sync')):
+        daemon = dataProcessor.CollectorDaemon(interval=0)
+        daemon.run_cycle()
+        daemon.run_cycle()
+
+    cycle = ['adsb', 'collect', 'backfill', 'agl', 'label', 'sync']
+    assert calls == ['fleet'] + cycle + cycle          # fleet unchanged → not reloaded
+    assert sync.call_args.kwargs['latest_timestamps'] is daemon.latest_timestamps
+    assert mock_db.close.call_count == 2
+
+
+# Only needed by ROI detection / labeling; the frequent cache refreshes must not pay for them
+HEAVY_MODULES = ('sklearn', 'scipy', 'shapely', 'rasterio')
+IMPORT_TIME_BUDGET_MS = int(os.getenv('IMPORT_TIME_BUDGET_MS', 1000))
+
+
+def _run_python(code, *flags):
+    # A fresh interpreter: this one has conftest's mocks in sys.modules
+    for module in ('sqlalchemy', 'psycopg2', 'requests', 'numpy'):
+        pytest.importorskip(module)
+    src = os.path.join(os.path.dirname(__file__), '../src')
+    return subprocess.run([sys.executable, *flags, '-c', code], cwd=src, capture_output=True, text=True, timeout=120)
+
+
+def test_import_needs_no_heavy_modules_and_no_engine():
+    result = _run_python(
+        "import sys\n"
+        "class Block:\n"
+        "    def find_spec(self, name, path=None, target=None):\n"
+        f"        if name.split('.')[0] in {HEAVY_MODULES!r}:\n"
+        "            raise ImportError('blocked: ' + name)\n"
+        "sys.meta_path.insert(0, Block())\n"
+        "import dataProcessor, migrate\n"
+        "assert dataProcessor._engine is None and migrate._engine is None\n"
+        "assert 'psycopg2' not in sys.modules\n"
+    )
+    assert result.returncode == 0, result.stderr
+
+
+def test_import_time_of_fast_path():
+    result = _run_python("import dataProcessor", "-X", "importtime")
+    assert result.returncode == 0, result.stderr
+
+    timings = {}
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            _, cumulative, name = line.split('|')
+            if cumulative.strip().isdigit():
+                timings[name.strip()] = int(cumulative)
+
+    assert not [m for m in timings if m.split('.')[0] in HEAVY_MODULES]
+    assert timings['dataProcessor'] / 1000 < IMPORT_TIME_BUDGET_MS
+
+
+def _sql(clause):
+    return str(clause.compile(compile_kwargs={"literal_binds": True}))
+
+
+def test_reverse_geocode_cache_ttl_and_lru_eviction(mock_db):
+    import dataProcessor
+    from geocoder import geohash_encode
+    gc = dataProcessor.migrate.GeocodeCache
+    now = 1_700_000_000
+    ttl_cutoff = now - 30 * 86400
+
+    read_q, write_q = MagicMock(), MagicMock()
+    mock_db.query.side_effect = lambda *cols: write_q if cols[0] is gc else read_q
+    cached_cell = geohash_encode(43.5, 4.5)
+    read_q.filter.return_value.all.return_value = [(cached_cell, 'France')]   # only unexpired rows come back
+
+    with patch.object(dataProcessor.time, 'time', return_value=now), \
+         patch.object(dataProcessor, 'GEOCODE_CACHE_TTL_DAYS', 30), \
+         patch.object(dataProcessor, 'GEOCODE_CACHE_MAX_ROWS', 2), \
+         patch.object(dataProcessor, '_reverse_geocode_location', return_value='Spain') as api:
+        locations, hits = dataProcessor._reverse_geocode_cached([(43.5, 4.5), (40.0, -3.7)])
+
+    assert locations == ['France', 'Spain'] and hits == 1
+    api.assert_called_once_with(40.0, -3.7)
+
+    # Lookups ignore rows past the TTL...
+    read_filters = [_sql(c) for c in read_q.filter.call_args.args]
+    assert f"geocode_cache.fetched_at >= {ttl_cutoff}" in read_filters
+    # ...which are then deleted, and only the MAX_ROWS most recently used cells are kept
+    ttl_delete = [c for c in write_q.filter.call_args_list if 'fetched_at <' in _sql(c.args[0])]
+    assert _sql(ttl_delete[0].args[0]) == f"geocode_cache.fetched_at < {ttl_cutoff}"
+    lru_sql, lru_params = mock_db.execute.call_args_list[-1].args
+    assert "ORDER BY last_used DESC OFFSET :keep" in str(lru_sql) and lru_params == {"keep": 2}
+    # Hits are touched so LRU keeps them
+    touched = [c for c in write_q.filter.call_args_list if 'cell IN' in _sql(c.args[0])]
+    assert touched and write_q.filter.return_value.update.called
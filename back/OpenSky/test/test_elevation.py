@@ -39,4 +39,49 @@ def test_get_elevation_out_of_bounds(mock_provider):
 def test_close_handle(mock_provider):
     provider, mock_ds = mock_provider
     provider.close()
-    mock_ds.close.assert_called_once()
\ No newline at end of file
+    mock_ds.close.assert_called_once()
+
+import numpy as np
+from elevation import DemTile, ElevationTileSet
+
+
+def make_tile(value_offset=0.0, left=4.0, top=44.0):
+    # 10x10 pixels of 0.1°, pixel value = row * 10 + col (+ offset)
+    data = np.arange(100, dtype=np.float32).reshape(10, 10) + value_offset
+    return DemTile(data, left=left, top=top, xres=0.1, yres=0.1)
+
+def test_tile_sample_matches_pixel_grid():
+    tile = make_tile()
+    # row = floor((44.0 - 43.75) / 0.1) = 2, col = floor((4.42 - 4.0) / 0.1) = 4
+    result = tile.sample(np.array([43.75]), np.array([4.42]))
+    assert result[0] == pytest.approx(24.0)
+
+def test_tile_sample_outside_is_nan():
+    tile = make_tile()
+    result = tile.sample(np.array([45.0, 43.95]), np.array([4.5, 3.9]))
+    assert np.isnan(result).all()
+
+def test_tile_set_first_tile_wins_and_falls_through():
+    first  = make_tile(value_offset=1000.0)
+    second = make_tile(value_offset=2000.0, left=5.0)
+    tiles  = ElevationTileSet([first, second])
+
+    result = tiles.sample([43.95, 43.95, 10.0], [4.05, 5.05, 10.0])
+
+    assert result[0] == pytest.approx(1000.0)
+    assert result[1] == pytest.approx(2000.0)
+    assert np.isnan(result[2])
+
+def test_tile_set_index_only_registers_overlapping_cells():
+    tiles = ElevationTileSet([make_tile(left=4.0, top=44.0), make_tile(left=10.0, top=50.0)])
+
+    # Tile 0 spans lat 43–44 / lon 4–5; cells on its far edges are included
+    assert tiles.index[ElevationTileSet._key(43, 4)] == [0]
+    assert tiles.index[ElevationTileSet._key(44, 5)] == [0]
+    assert ElevationTileSet._key(46, 7) not in tiles.index
+
+def test_tile_set_get_elevation_on_tile_edge():
+    tiles = ElevationTileSet([make_tile()])
+
+    assert tiles.get_elevation(44.0, 4.0) == pytest.approx(0.0)
+    assert tiles.get_elevation(47.0, 4.0) is None
@@ -0,0 +1,132 @@
+from fr24Cache import FR24TrackCache, records_to_points
+
+
+LEG_A = [[1000, 43.5, 4.5, 1234.3, 90, False], [1010, 43.51, 4.52, None, None, False]]
+LEG_B = [[2000, 44.0, 5.0, 0.0, 180, True]]
+
+
+def test_legs_round_trip_through_binary_cache(tmp_path):
+    directory = str(tmp_path / 'fr24_cache')
+    cache = FR24TrackCache(directory)
+    cache.begin()
+    cache.append_leg('3b7b39', 'leg-a', LEG_A, ended=True)
+    cache.append_leg('3b7b39', 'leg-b', LEG_B)
+    assert cache.commit() == 3
+
+    reread = FR24TrackCache(directory)
+    assert reread.icaos() == ['3b7b39']
+    assert reread.fr24_id('3b7b39') == 'leg-b'
+    assert records_to_points(reread.track('3b7b39')) == LEG_A + LEG_B
+
+    leg_b = reread.legs('3b7b39')[1]
+    assert leg_b['start'] == 2 and not leg_b['ended']
+    assert records_to_points(reread.leg_track('3b7b39', leg_b)) == LEG_B
+
+
+def test_empty_run_leaves_an_empty_cache(tmp_path):
+    directory = str(tmp_path / 'fr24_cache')
+    cache = FR24TrackCache(directory)
+    cache.begin()
+    cache.append_leg('3b7b39', 'leg-a', LEG_A)
+    cache.commit()
+
+    cache.begin()
+    assert cache.commit() == 0
+    assert FR24TrackCache(directory).icaos() == []
+    assert len([p for p in tmp_path.iterdir() if p.name.startswith('fr24_cache.v')]) == 1
+
+
+def test_reader_keeps_its_version_across_a_swap(tmp_path):
+    directory = str(tmp_path / 'fr24_cache')
+    writer = FR24TrackCache(directory)
+    writer.begin()
+    writer.append_leg('3b7b39', 'leg-a', LEG_A, ended=True)
+    writer.commit()
+
+    reader = FR24TrackCache(directory)
+    writer.begin()
+    writer.append_leg('3b7b40', 'leg-c', LEG_B)
+    writer.commit()   # removes the version the reader opened
+
+    assert reader.icaos() == ['3b7b39']
+    assert records_to_points(reader.track('3b7b39')) == LEG_A
+    assert FR24TrackCache(directory).icaos() == ['3b7b40']
+
+
+def test_plain_directory_from_older_release_is_replaced(tmp_path):
+    (tmp_path / 'fr24_cache').mkdir()
+    (tmp_path / 'fr24_cache' / 'index.json').write_text('{}')
+    cache = FR24TrackCache(str(tmp_path / 'fr24_cache'))
+    cache.begin()
+    cache.append_leg('3b7b39', 'leg-b', LEG_B)
+    cache.commit()
+
+    assert (tmp_path / 'fr24_cache').is_symlink()
+    assert records_to_points(FR24TrackCache(str(tmp_path / 'fr24_cache')).track('3b7b39')) == LEG_B
+
+
+def test_track_since_drops_points_up_to_each_leg_checkpoint(tmp_path):
+    cache = FR24TrackCache(str(tmp_path / 'fr24_cache'))
+    cache.begin()
+    cache.append_leg('3b7b39', 'leg-a', LEG_A, ended=True)
+    cache.append_leg('3b7b39', 'leg-b', LEG_B)
+    cache.append_leg('3b7b40', 'leg-c', [], last_ts=1500)   # delta fetch with nothing new
+    cache.commit()
+
+    assert records_to_points(cache.track_since('3b7b39', {'leg-a': 1000})) == LEG_A[1:] + LEG_B
+    assert records_to_points(cache.track_since('3b7b39', {'leg-a': 1010, 'leg-b': 2000})) == []
+    assert cache.legs('3b7b40')[0]['last_ts'] == 1500
+    assert len(cache.track('3b7b40')) == 0
+
+
+def test_altitude_and_track_round_trip_exactly(tmp_path):
+    points = [[1000, 43.5, 4.5, 1234.567, 271.25, False]]
+    cache = FR24TrackCache(str(tmp_path / 'fr24_cache'))
+    cache.begin()
+    cache.append_leg('3b7b39', 'leg-a', points)
+    cache.commit()
+
+    assert records_to_points(FR24TrackCache(str(tmp_path / 'fr24_cache')).track('3b7b39')) == points
+
+
+def test_track_file_not_matching_the_index_is_ignored(tmp_path):
+    directory = tmp_path / 'fr24_cache'
+    cache = FR24TrackCache(str(directory))
+    cache.begin()
+    cache.append_leg('3b7b39', 'leg-a', LEG_A)
+    cache.commit()
+    (directory / '3b7b39.bin').write_bytes(b'\0' * 10)   # e.g. written with an older record layout
+
+    reread = FR24TrackCache(str(directory))
+    assert reread.icaos() == ['3b7b39']
+    assert len(reread.track('3b7b39')) == 0
+
+
+def test_empty_delta_keeps_the_previous_leg_state(tmp_path):
+    cache = FR24TrackCache(str(tmp_path / 'fr24_cache'))
+    cache.begin()
+    cache.append_leg('3b7b39', 'leg-b', LEG_B)   # landed at 2000
+    cache.commit()
+    previous = cache.legs('3b7b39')[0]
+
+    cache.begin()
+    cache.append_leg('3b7b39', 'leg-b', [], last_ts=1990, previous=previous)
+    cache.commit()
+
+    leg = cache.legs('3b7b39')[0]
+    assert leg['on_ground'] and leg['last_ts'] == 2000 and leg['count'] == 0
+
+
+def test_abort_keeps_the_live_cache(tmp_path):
+    directory = str(tmp_path / 'fr24_cache')
+    cache = FR24TrackCache(directory)
+    cache.begin()
+    cache.append_leg('3b7b39', 'leg-a', LEG_A)
+    cache.commit()
+
+    cache.begin()
+    cache.append_leg('3b7b40', 'leg-b', LEG_B)
+    cache.abort()
+
+    assert FR24TrackCache(directory).icaos() == ['3b7b39']
+    assert len([p for p in tmp_path.iterdir() if p.name.startswith('fr24_cache.v')]) == 1
@@ -0,0 +1,37 @@
+import sys
+import pytest
+from unittest.mock import MagicMock
+from geocoder import geohash_encode
+
+
+def test_geohash_known_values():
+    assert geohash_encode(57.64911, 10.40744, 11) == 'u4pruydqqvj'
+    assert geohash_encode(-25.382708, -49.265506) == '6gkzwg'
+
+
+def test_geohash_nearby_points_share_cell():
+    assert geohash_encode(43.5001, 4.5001) == geohash_encode(43.5003, 4.5003)
+    assert geohash_encode(43.5, 4.5) != geohash_encode(43.6, 4.5)
+
+
+needs_shapely = pytest.mark.skipif(isinstance(sys.modules.get('shapely'), MagicMock), reason="shapely not installed")
+
+
+@needs_shapely
+def test_lookup_lon_lat_order_edges_and_misses():
+    from shapely.geometry import Polygon
+    from geocoder import OfflineGeocoder
+
+    # GeoJSON [lon, lat]; the country is listed first and wins where they overlap
+    geocoder = OfflineGeocoder([
+        Polygon([(0, 42), (8, 42), (8, 51), (0, 51)]),
+        Polygon([(3, 38), (10, 38), (10, 43.5), (3, 43.5)]),
+    ], ['France', 'Mediterranean Sea'])
+
+    lats = [43.0, 40.0, 51.0, 5.0, -30.0]
+    lons = [5.0, 5.0, 4.0, 43.0, 5.0]
+    result = geocoder.lookup(lats, lons)
+
+    # overlap → first, sea only, on the top edge (not within), lat/lon swapped, nowhere
+    assert list(result) == ['France', 'Mediterranean Sea', None, None, None]
+    assert list(OfflineGeocoder([], []).lookup([43.0], [5.0])) == [None]
@@ -0,0 +1,62 @@
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from httpSession import create_session, connection_stats
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    status = 200
+    hits = 0
+
+    def do_GET(self):
+        type(self).hits += 1
+        body = b"ok"
+        self.send_response(self.status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_session_reuses_connection_and_counts_requests():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    session = create_session()
+    try:
+        url = f"http://127.0.0.1:{server.server_port}/"
+        for _ in range(5):
+            assert session.get(url).text == "ok"
+
+        stats = connection_stats(session)
+        assert stats["requests"] == 5
+        assert stats["connections"] == 1
+    finally:
+        session.close()
+        server.shutdown()
+
+
+def test_metered_prefix_is_not_retried_by_urllib3():
+    class Unavailable(_Handler):
+        status = 503
+        hits = 0
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Unavailable)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    session = create_session(retries=2, backoff_factor=0, metered=(f"{base}/metered/",))
+    try:
+        assert session.get(f"{base}/metered/track").status_code == 503
+        assert Unavailable.hits == 1                    # one attempt, left to the caller's budget
+
+        assert session.get(f"{base}/free").status_code == 503
+        assert Unavailable.hits == 1 + 3                # transparent retries elsewhere
+    finally:
+        session.close()
+        server.shutdown()
@@ -0,0 +1,138 @@
+import time
+import requests
+from unittest.mock import patch, MagicMock
+from openSkyCollector import RateLimiter, FirefleetCollector
+
+
+def make_response(status, json_data=None, headers=None):
+    response = MagicMock()
+    response.status_code = status
+    response.headers = headers or {}
+    response.json.return_value = json_data
+    if status >= 400:
+        response.raise_for_status.side_effect = requests.exceptions.HTTPError(response=response)
+    return response
+
+
+def test_rate_limiter_allows_burst_then_paces():
+    limiter = RateLimiter(rate=20, burst=2)
+
+    start = time.monotonic()
+    for _ in range(4):
+        assert limiter.acquire()
+    elapsed = time.monotonic() - start
+
+    assert 0.08 <= elapsed < 0.5  # 2 immediate, then 2 more at 20/s
+
+
+def test_rate_limiter_gives_up_beyond_max_wait():
+    limiter = RateLimiter(rate=1, burst=1)
+    limiter.pause(30)
+
+    assert limiter.acquire(max_wait=1) is False
+
+
+def test_track_429_backs_off_using_opensky_header_then_retries():
+    limiter = MagicMock()
+    limiter.acquire.return_value = True
+    session = MagicMock()
+    session.get.side_effect = [
+        make_response(429, headers={'X-Rate-Limit-Retry-After-Seconds': '7'}),
+        make_response(200, {'path': [[1000, 43.0, 4.0, 100.0, 90.0, False]]}),
+    ]
+    collector = FirefleetCollector('token', rate_limiter=limiter, session=session)
+
+    track = collector.get_aircraft_track('3B7B39')
+
+    assert track == {'path': [[1000, 43.0, 4.0, 100.0, 90.0, False]]}
+    limiter.pause.assert_called_once_with(7.0)
+    assert limiter.acquire.call_count == 2
+
+
+def test_get_aircraft_tracks_skips_failed_fetches():
+    collector = FirefleetCollector('token', rate_limiter=RateLimiter(rate=1000, burst=10))
+
+    with patch.object(collector, 'get_aircraft_track', side_effect=lambda icao: {'path': []} if icao == 'a' else None):
+        tracks = collector.get_aircraft_tracks(['a', 'b'])
+
+    assert tracks == {'a': {'path': []}}
+
+
+def test_fr24_budget_waits_only_when_window_is_full(tmp_path):
+    from openSkyCollector import FR24Budget
+
+    path = str(tmp_path / 'budget.json')
+    budget = FR24Budget(limit=2, window=0.2, path=path)
+
+    start = time.monotonic()
+    budget.acquire()
+    budget.acquire()
+    assert time.monotonic() - start < 0.1
+    budget.acquire()
+    assert time.monotonic() - start >= 0.15
+
+    # A new run sees the calls made by the previous one
+    assert FR24Budget(limit=2, window=60, path=path).available() == 0
+
+
+def test_fr24_budget_instances_sharing_a_file_merge_their_calls(tmp_path):
+    from openSkyCollector import FR24Budget
+
+    path = str(tmp_path / 'budget.json')
+    first = FR24Budget(limit=3, window=60, path=path)
+    second = FR24Budget(limit=3, window=60, path=path)   # loaded before first made any call
+
+    first.acquire()
+    second.acquire()
+    second.penalize(0)
+    first.acquire()
+
+    # Neither save dropped the other's calls, and both see the shared budget
+    assert FR24Budget(limit=3, window=60, path=path).available() == 0
+    assert second.available() == 0
+    assert len(first.calls) == 3
+
+
+def test_fr24_budget_dry_run_plans_without_waiting_or_saving(tmp_path):
+    from openSkyCollector import FR24Budget
+
+    path = tmp_path / 'budget.json'
+    budget = FR24Budget(limit=1, window=60, path=str(path), dry_run=True)
+    for i in range(3):
+        budget.acquire(f"call {i}")
+
+    assert budget.planned == ['call 0', 'call 1', 'call 2']
+    assert not path.exists()
+
+
+def test_fr24_429_blocks_budget_and_retries():
+    from openSkyCollector import FR24Collector
+
+    budget = MagicMock()
+    session = MagicMock()
+    session.get.side_effect = [
+        make_response(429, headers={'Retry-After': '30'}),
+        make_response(200, {'tracks': [{'timestamp': '2026-07-03T10:00:00Z', 'lat': 43.0, 'lon': 4.0, 'alt': 0}]}),
+    ]
+    collector = FR24Collector(session=session, budget=budget)
+
+    points = collector.get_track('3b7b39', 'abc123')
+
+    assert len(points) == 1 and points[0][5] is True
+    budget.penalize.assert_called_once_with(30.0)
+    assert budget.acquire.call_count == 2
+
+
+def test_fr24_parse_track_keeps_only_points_after_checkpoint():
+    from openSkyCollector import FR24Collector
+    body = {'tracks': [
+        {'timestamp': '2024-08-01T10:00:00Z', 'lat': 43.5, 'lon': 4.5, 'alt': 1000, 'track': 90},
+        {'timestamp': '2024-08-01T10:00:30Z', 'lat': 43.6, 'lon': 4.6, 'alt': 1200, 'track': 90},
+        {'timestamp': '2024-08-01T12:01:00+02:00', 'lat': 43.7, 'lon': 4.7, 'alt': 0, 'track': 95},
+    ]}
+    since = 1722506400  # 2024-08-01T10:00:00Z
+
+    points = FR24Collector._parse_track(body, since_ts=since)
+
+    assert [p[0] for p in points] == [since + 30, since + 60]
+    assert len(FR24Collector._parse_track(body)) == 3